@@ -1,40 +1,82 @@
 # app/auth/dependencies.py
 
+import time
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime
 from app.auth.utils import SECRET_KEY, ALGORITHM
+from app.config import PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES
 from app.database import db
 from app.schemas.user_schema import UserResponse  # now includes is_admin
+from app.utils.ttl_cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# token -> subject email, for tokens whose signature/expiry we already checked
+token_cache = TTLCache(max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+# subject email -> UserResponse
+principal_cache = TTLCache(max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def token_subject(token: str) -> Optional[str]:
+    """
+    Verify `token` and return its subject, memoizing the result until the
+    token expires (or the cache TTL runs out, whichever comes first).
+    """
+    email = token_cache.get(token)
+    if email is not None:
+        return email
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    email = payload.get("sub")
+    if not email:
+        return None
+    ttl = token_cache.ttl_seconds
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    token_cache.set(token, email, ttl_seconds=ttl)
+    return email
+
+
+def invalidate_principal(email: str):
+    """
+    Drop a cached principal after its user document changed (role, name...).
+    """
+    principal_cache.pop(email)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserResponse:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if not email:
-            raise credentials_exception
-    except JWTError:
+    email = token_subject(token)
+    if not email:
         raise credentials_exception
 
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
     user_doc = await db.users.find_one({"email": email})
     if not user_doc:
         raise credentials_exception
 
-    return UserResponse(
+    user = UserResponse(
         id=str(user_doc["_id"]),
         name=user_doc["name"],
         email=user_doc["email"],
         is_admin=user_doc.get("is_admin", False),    # ← read it here
         created_at=user_doc["created_at"],
     )
+    principal_cache.set(email, user)
+    return user
 
 async def require_admin(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
     if not current_user.is_admin:
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from typing import List
 
 from app.schemas.user_schema import (
@@ -12,12 +13,13 @@ from app.schemas.user_schema import (
     UserResponse,
     UserUpdateRequest,
 )
-from app.auth.utils import hash_password, verify_password, create_access_token
-from app.auth.dependencies import get_current_user, require_admin
+from app.auth.utils import hash_password_async, verify_password_async, create_access_token
+from app.auth.dependencies import get_current_user, require_admin, invalidate_principal
 from app.database import db
 from app.models.user_model import user_helper
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=FastJSONRoute)
 
 
 @router.get("/user", response_model=UserResponse)
@@ -40,12 +42,15 @@ async def signup(user: UserCreate):
 
     # 2) Hash password + insert
     user_dict = user.model_dump()
-    hashed = hash_password(user_dict.pop("password"))
+    hashed = await hash_password_async(user_dict.pop("password"))
     user_dict["hashed_password"] = hashed
     user_dict["created_at"] = datetime.utcnow()
     user_dict["is_admin"] = False  # default to non-admin
 
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:  # lost a signup race; unique index on email
+        raise HTTPException(status_code=400, detail="Email already registered")
     new_user = await db.users.find_one({"_id": result.inserted_id})
     return user_helper(new_user)
 
@@ -56,7 +61,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     Authenticate with email/password (form‑encoded). Return a Bearer token.
     """
     user = await db.users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -80,7 +85,7 @@ async def update_current_user_info(
         update_data["name"] = update.name
 
     if update.password:
-        update_data["hashed_password"] = hash_password(update.password)
+        update_data["hashed_password"] = await hash_password_async(update.password)
 
     if not update_data:
         raise HTTPException(status_code=400, detail="No valid fields to update")
@@ -90,6 +95,7 @@ async def update_current_user_info(
         {"_id": ObjectId(current_user.id)},
         {"$set": update_data}
     )
+    invalidate_principal(current_user.email)
 
     # 4) Fetch fresh document and run it through user_helper(...)
     updated = await db.users.find_one({"_id": ObjectId(current_user.id)})
@@ -124,10 +130,12 @@ async def promote_user_to_admin(user_id: str):
     except Exception:
         raise HTTPException(400, "Invalid user_id format")
 
-    result = await db.users.update_one(
+    user = await db.users.find_one_and_update(
         {"_id": oid},
-        {"$set": {"is_admin": True}}
+        {"$set": {"is_admin": True}},
+        projection={"email": 1},
     )
-    if result.matched_count == 0:
+    if user is None:
         raise HTTPException(404, f"No user found with id {user_id}")
+    invalidate_principal(user["email"])
     return {"message": f"User {user_id} is now an admin"}
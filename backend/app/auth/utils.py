@@ -1,7 +1,20 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from app.config import JWT_SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import (
+    JWT_SECRET_KEY,
+    JWT_ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_POOL_KIND,
+    PASSWORD_POOL_WORKERS,
+    PASSWORD_POOL_MAX_QUEUE,
+    PASSWORD_POOL_RETRY_AFTER,
+)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = "your_secret_key_here"  # keep it safe, load from env in prod
@@ -15,6 +28,107 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _timed_call(fn, *args):
+    # Runs inside the worker; wall-clock timestamps so they are comparable
+    # with the submitting process when a process pool is used.
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+
+class PasswordPool:
+    """
+    Bounded executor for bcrypt work with admission control.
+
+    At most `workers + max_queue` calls may be in flight; beyond that the
+    caller gets a 503 with Retry-After instead of piling onto the queue.
+    Records how long calls wait for a worker versus how long hashing takes.
+    """
+
+    def __init__(self, workers: int, max_queue: int, kind: str = "thread", retry_after: int = 1):
+        self.workers = workers
+        self.max_in_flight = workers + max_queue
+        self.kind = kind
+        self.retry_after = retry_after
+        self._executor: Executor | None = None
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.work_time_total = 0.0
+        self.work_time_max = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.in_flight += 1
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self.executor, _timed_call, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+        wait, work = max(started - submitted, 0.0), finished - started
+        self.completed += 1
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+        self.work_time_total += work
+        self.work_time_max = max(self.work_time_max, work)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        done = max(self.completed, 1)
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": round(self.queue_wait_total / done * 1000, 2),
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 2),
+            "hash_time_avg_ms": round(self.work_time_total / done * 1000, 2),
+            "hash_time_max_ms": round(self.work_time_max * 1000, 2),
+        }
+
+
+password_pool = PasswordPool(
+    workers=PASSWORD_POOL_WORKERS,
+    max_queue=PASSWORD_POOL_MAX_QUEUE,
+    kind=PASSWORD_POOL_KIND,
+    retry_after=PASSWORD_POOL_RETRY_AFTER,
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -27,4 +141,4 @@ def decode_access_token(token: str):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
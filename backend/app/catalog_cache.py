@@ -0,0 +1,207 @@
+# app/catalog_cache.py
+
+import hashlib
+import logging
+from typing import Any, Optional
+
+from bson import json_util
+
+from app.config import (
+    CATALOG_CACHE_BACKEND,
+    CATALOG_CACHE_MAX_ENTRIES,
+    CATALOG_CACHE_TTL_SECONDS,
+    REDIS_URL,
+)
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """
+    Per-process LRU.  Query results are namespaced by a generation number so
+    invalidating all of them is a single increment; stale generations simply
+    age out of the LRU.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.lru = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.generation = 0
+
+    async def get(self, key: str) -> Any:
+        return self.lru.get(key)
+
+    async def set(self, key: str, value: Any):
+        self.lru.set(key, value)
+
+    async def delete(self, key: str):
+        self.lru.pop(key)
+
+    async def get_query(self, field: str) -> Any:
+        return self.lru.get(("q", self.generation, field))
+
+    async def set_query(self, field: str, value: Any):
+        self.lru.set(("q", self.generation, field), value)
+
+    async def clear_queries(self):
+        self.generation += 1
+
+    def stats(self) -> dict:
+        return {**self.lru.stats(), "query_generation": self.generation}
+
+
+class RedisBackend:
+    """
+    Shared cache for multi-worker deployments.  Every entry is its own key
+    with a TTL.  Query results are namespaced by a generation counter kept
+    in Redis, so invalidating all of them is one INCR and stale generations
+    simply expire.  Values are stored as extended JSON to keep
+    datetimes/ObjectIds intact.
+    """
+
+    name = "redis"
+    PREFIX = "catalog:"
+    GENERATION = "catalog:queries:gen"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio as redis  # optional: only needed for this backend
+
+        self.redis = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, raw: Optional[bytes]) -> Any:
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json_util.loads(raw)
+
+    async def get(self, key: str) -> Any:
+        return self._load(await self.redis.get(self.PREFIX + key))
+
+    async def set(self, key: str, value: Any):
+        await self.redis.set(self.PREFIX + key, json_util.dumps(value), ex=self.ttl_seconds)
+
+    async def delete(self, key: str):
+        await self.redis.delete(self.PREFIX + key)
+
+    async def _query_key(self, field: str) -> str:
+        generation = await self.redis.get(self.GENERATION)
+        return f"{self.PREFIX}q:{int(generation or 0)}:{field}"
+
+    async def get_query(self, field: str) -> Any:
+        return self._load(await self.redis.get(await self._query_key(field)))
+
+    async def set_query(self, field: str, value: Any):
+        await self.redis.set(await self._query_key(field), json_util.dumps(value), ex=self.ttl_seconds)
+
+    async def clear_queries(self):
+        await self.redis.incr(self.GENERATION)
+
+    def stats(self) -> dict:
+        # Evictions happen inside Redis (maxmemory policy) and show up in
+        # its own INFO stats rather than here.
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class CatalogCache:
+    """
+    Read-through cache for catalog reads (single products, listing/search
+    pages, categories) with explicit invalidation from the admin write paths.
+
+    Backend errors are logged and treated as misses so a cache outage never
+    takes the catalog down with it.
+    """
+
+    CATEGORIES = "categories"
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.errors = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def query_field(kind: str, params: dict) -> str:
+        normalized = json_util.dumps(
+            {k: v for k, v in sorted(params.items()) if v is not None},
+            separators=(",", ":"),
+        )
+        return f"{kind}:{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+    async def _call(self, method: str, *args) -> Any:
+        if self.backend is None:
+            return None
+        try:
+            return await getattr(self.backend, method)(*args)
+        except Exception:
+            self.errors += 1
+            logger.warning("catalog cache %s failed", method, exc_info=True)
+            return None
+
+    # ─── READS ──────────────────────────────────────────────────────────────
+    async def get_product(self, product_id: str) -> Optional[dict]:
+        return await self._call("get", f"product:{product_id}")
+
+    async def set_product(self, product_id: str, product: dict):
+        await self._call("set", f"product:{product_id}", product)
+
+    async def get_query(self, kind: str, **params) -> Any:
+        return await self._call("get_query", self.query_field(kind, params))
+
+    async def set_query(self, kind: str, value: Any, **params):
+        await self._call("set_query", self.query_field(kind, params), value)
+
+    async def get_categories(self) -> Optional[list]:
+        return await self._call("get", self.CATEGORIES)
+
+    async def set_categories(self, categories: list):
+        await self._call("set", self.CATEGORIES, categories)
+
+    # ─── INVALIDATION ───────────────────────────────────────────────────────
+    async def invalidate_product(
+        self,
+        product_id: Optional[str] = None,
+        categories: bool = True,
+        queries: bool = True,
+    ):
+        """
+        Called after a catalog write.  Drops the product's own entry, every
+        cached listing/search page (membership or order may have changed)
+        and, when the category set may have changed, the category list.
+        """
+        self.invalidations += 1
+        if product_id:
+            await self._call("delete", f"product:{product_id}")
+        if queries:
+            await self._call("clear_queries")
+        if categories:
+            await self._call("delete", self.CATEGORIES)
+
+    def stats(self) -> dict:
+        if self.backend is None:
+            return {"backend": "off"}
+        return {
+            "backend": self.backend.name,
+            **self.backend.stats(),
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+def build_backend(kind: str):
+    if kind == "memory":
+        return MemoryBackend(CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL_SECONDS)
+    if kind == "redis":
+        return RedisBackend(REDIS_URL, CATALOG_CACHE_TTL_SECONDS)
+    return None
+
+
+catalog_cache = CatalogCache(build_backend(CATALOG_CACHE_BACKEND))
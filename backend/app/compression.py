@@ -0,0 +1,329 @@
+# app/compression.py
+"""
+Response compression (gzip, and brotli when the optional `brotli` package is
+installed) plus precompressed sidecar files for static mounts.
+
+    python -m app.compression uploads/   # write .gz/.br sidecars next to
+                                         # every compressible file
+"""
+
+import argparse
+import gzip
+import mimetypes
+import os
+import stat
+import zlib
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_TYPES,
+)
+
+try:
+    import brotli  # optional: gzip only without it
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(headers: Headers) -> set[str]:
+    """
+    Codings the client accepts (q > 0) that we can produce.
+    """
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    if "*" in accepted:
+        accepted |= {"br", "gzip"}
+    if brotli is None:
+        accepted.discard("br")
+    return accepted & {"br", "gzip"}
+
+
+def preferred_encoding(headers: Headers) -> Optional[str]:
+    accepted = accepted_encodings(headers)
+    for coding in ("br", "gzip"):
+        if coding in accepted:
+            return coding
+    return None
+
+
+def compressible(content_type: str, allowlist: tuple[str, ...] = COMPRESSION_TYPES) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return any(media_type == t or (t.endswith("/") and media_type.startswith(t)) for t in allowlist)
+
+
+class CompressionStats:
+    """
+    Counters for the compression middleware and precompressed static files.
+    """
+
+    def __init__(self):
+        self.responses = {"br": 0, "gzip": 0}
+        self.skipped = {"too_small": 0, "content_type": 0, "encoded": 0}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.sidecar_hits = 0
+        self.sidecar_bytes_saved = 0
+
+    def record(self, coding: str, bytes_in: int, bytes_out: int):
+        self.responses[coding] += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def stats(self) -> dict:
+        return {
+            "responses": dict(self.responses),
+            "skipped": dict(self.skipped),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "sidecar_hits": self.sidecar_hits,
+            "sidecar_bytes_saved": self.sidecar_bytes_saved,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class _Compressor:
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        if coding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+            self._finish = self._impl.finish
+            self._compress = self._impl.process
+        else:
+            # wbits 16 + MAX_WBITS -> gzip container
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._finish = self._impl.flush
+            self._compress = self._impl.compress
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses whose content type is on the allowlist and whose body
+    is at least `minimum_size` bytes.  Bodies that arrive in one message
+    (every JSON route) are compressed in one go with an exact
+    Content-Length; streamed bodies are compressed chunk by chunk.
+    Responses that already carry a Content-Encoding (e.g. precompressed
+    static files) pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        content_types: tuple[str, ...] = COMPRESSION_TYPES,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = preferred_encoding(Headers(scope=scope))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, coding, send).run(scope, receive)
+
+
+class _CompressedResponder:
+    def __init__(self, config: CompressionMiddleware, coding: str, send: Send):
+        self.config = config
+        self.coding = coding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def run(self, scope: Scope, receive: Receive):
+        await self.config.app(scope, receive, self.on_send)
+
+    def _decide(self, headers: MutableHeaders) -> bool:
+        stats = self.config.stats
+        if "content-encoding" in headers:
+            stats.skipped["encoded"] += 1
+            return False
+        if not compressible(headers.get("content-type", ""), self.config.content_types):
+            stats.skipped["content_type"] += 1
+            return False
+        return True
+
+    async def on_send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._decide(MutableHeaders(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start["headers"])
+
+        if self.compressor is None:
+            if not more_body:
+                await self._send_whole(headers, body)
+                return
+            # Streaming: commit to compressing without knowing the size.
+            self.compressor = _Compressor(self.coding, self.config.gzip_level, self.config.brotli_quality)
+            self._mark_encoded(headers)
+            del headers["content-length"]
+            await self.send(self.start)
+
+        self.bytes_in += len(body)
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        self.bytes_out += len(chunk)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self.config.stats.record(self.coding, self.bytes_in, self.bytes_out)
+
+    async def _send_whole(self, headers: MutableHeaders, body: bytes):
+        if len(body) < self.config.minimum_size:
+            self.config.stats.skipped["too_small"] += 1
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        compressor = _Compressor(self.coding, self.config.gzip_level, self.config.brotli_quality)
+        compressed = compressor.compress(body) + compressor.finish()
+        self._mark_encoded(headers)
+        headers["content-length"] = str(len(compressed))
+        self.config.stats.record(self.coding, len(body), len(compressed))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    def _mark_encoded(self, headers: MutableHeaders):
+        headers["content-encoding"] = self.coding
+        headers.add_vary_header("Accept-Encoding")
+        # The compressed bytes differ from what a strong ETag describes, so
+        # weaken it (as nginx does); If-None-Match compares weakly anyway.
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = "W/" + etag
+
+
+# ─── PRECOMPRESSED STATIC FILES ─────────────────────────────────────────────
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves `<file>.br` / `<file>.gz` next to `<file>` when
+    the client accepts that coding, with the original file's content type.
+    """
+
+    def __init__(self, *args, stats: CompressionStats = compression_stats, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            accepted = accepted_encodings(Headers(scope=scope))
+            for coding, suffix in SIDECARS:
+                if coding not in accepted:
+                    continue
+                response = await self._sidecar_response(path, suffix, coding, scope)
+                if response is not None:
+                    return response
+        response = await super().get_response(path, scope)
+        if isinstance(response, FileResponse) and compressible(response.media_type or ""):
+            response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+    async def _sidecar_response(self, path: str, suffix: str, coding: str, scope: Scope) -> Optional[Response]:
+        try:
+            sidecar_path, sidecar_stat = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            _, original_stat = await anyio.to_thread.run_sync(self.lookup_path, path)
+        except OSError:
+            return None
+        if not (sidecar_stat and stat.S_ISREG(sidecar_stat.st_mode)):
+            return None
+        if not (original_stat and stat.S_ISREG(original_stat.st_mode)):
+            return None
+        if sidecar_stat.st_mtime < original_stat.st_mtime:
+            return None  # stale sidecar; serve the original
+
+        media_type = mimetypes.guess_type(path)[0] or "text/plain"
+        response = FileResponse(sidecar_path, stat_result=sidecar_stat, media_type=media_type)
+        response.headers["content-encoding"] = coding
+        response.headers.add_vary_header("Accept-Encoding")
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        self.stats.sidecar_hits += 1
+        self.stats.sidecar_bytes_saved += original_stat.st_size - sidecar_stat.st_size
+        return response
+
+
+def precompress(directory: str, minimum_size: int = COMPRESSION_MIN_SIZE) -> list[tuple[str, int, int]]:
+    """
+    Write .gz (and .br when available) sidecars for every compressible file
+    under `directory` that is at least `minimum_size` bytes.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(root, name)
+            media_type = mimetypes.guess_type(name)[0] or ""
+            if not compressible(media_type) or os.path.getsize(path) < minimum_size:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            outputs = [(".gz", gzip.compress(data, COMPRESSION_GZIP_LEVEL))]
+            if brotli is not None:
+                outputs.append((".br", brotli.compress(data, quality=11)))
+            for suffix, compressed in outputs:
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
+                written.append((path + suffix, len(data), len(compressed)))
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    args = parser.parse_args()
+    for path, original, compressed in precompress(args.directory):
+        print(f"{path:<60} {original:>10} -> {compressed:>10}")
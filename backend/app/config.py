@@ -8,4 +8,135 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # 1 hour
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "mini_amazon")
 
+# Motor/pymongo connection pool, per worker process: size it so
+# workers * MONGO_MAX_POOL_SIZE stays well under the server's connection
+# limit.  MONGO_MIN_POOL_SIZE connections are opened at startup (warm-up) and
+# kept open.  A checkout that waits longer than MONGO_WAIT_QUEUE_TIMEOUT_MS
+# fails instead of queueing forever (0 = no limit).
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))
+# Wire compression, e.g. "zstd,zlib" (the server must allow it too; zstd and
+# snappy need their optional python packages).
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+# Public catalog reads (product listing/search/detail, categories) may go to
+# secondaries, e.g. "secondaryPreferred".  Admin and order paths always read
+# the primary.  With secondaries, a read right after an admin write may see
+# (and cache, for up to CATALOG_CACHE_TTL_SECONDS) the replication-lagged copy.
+MONGO_CATALOG_READ_PREFERENCE = os.getenv("MONGO_CATALOG_READ_PREFERENCE", "primary")
+
+# Command monitoring: per-command counts/durations (admin stats, /metrics),
+# a warning log with the filter shape for commands slower than
+# MONGO_SLOW_COMMAND_MS (0 = never), and a per-request
+# "Server-Timing: db;dur=..;desc=\"N calls\"" response header.
+MONGO_COMMAND_MONITORING = os.getenv("MONGO_COMMAND_MONITORING", "true").lower() in ("1", "true", "yes")
+MONGO_SLOW_COMMAND_MS = float(os.getenv("MONGO_SLOW_COMMAND_MS", "100"))
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Rebuild the in-memory product search index this often (0 = only on startup
+# and admin writes).  Set it when running several workers.
+SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "0"))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Catalog read cache: "memory" (per process), "redis" (shared) or "off".
+CATALOG_CACHE_BACKEND = os.getenv("CATALOG_CACHE_BACKEND", "memory")
+CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "10000"))
+
+# Password hashing runs in a dedicated pool ("thread" or "process") so bcrypt
+# never blocks the event loop.  Requests beyond workers + max queue get 503.
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64"))
+PASSWORD_POOL_RETRY_AFTER = int(os.getenv("PASSWORD_POOL_RETRY_AFTER", "1"))
+
+# Authenticated principals (user documents) and verified JWTs are cached per
+# process; admin/user writes invalidate locally, the TTL bounds staleness on
+# other workers.
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+# Idempotency-Key records for order placement: how long a completed response
+# is replayed, how long a duplicate waits for the original to finish, and
+# after how long an unfinished claim (crashed worker) may be taken over.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+
+# Keep a materialized order-counters document (total + per status) that
+# place_order / update_order_status maintain with $inc, so the admin
+# dashboard reads one document instead of aggregating the orders collection.
+ORDER_COUNTERS_ENABLED = os.getenv("ORDER_COUNTERS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# WebSocket fan-out: each socket has a bounded outbound queue drained by its
+# own writer task.  A send slower than WS_SEND_TIMEOUT_SECONDS closes the
+# socket; a full queue either drops the message or disconnects the consumer.
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+WS_MAX_QUEUE = int(os.getenv("WS_MAX_QUEUE", "100"))
+WS_SLOW_CONSUMER = os.getenv("WS_SLOW_CONSUMER", "disconnect")  # "drop" or "disconnect"
+
+# Cross-worker WebSocket pushes: "memory" (single process) or "redis" (pub/sub
+# channel shared by every worker).  Events published within the batch window
+# go out as one message.
+WS_BACKPLANE = os.getenv("WS_BACKPLANE", "memory")
+WS_BACKPLANE_CHANNEL = os.getenv("WS_BACKPLANE_CHANNEL", "ws:push")
+WS_BATCH_WINDOW_MS = int(os.getenv("WS_BATCH_WINDOW_MS", "5"))
+WS_BATCH_MAX = int(os.getenv("WS_BATCH_MAX", "100"))
+
+# WebSocket liveness: the server sends {"type": "ping"} every interval and
+# closes sockets that haven't sent anything (pong or otherwise) within the
+# idle timeout.  order_update events for the same order published within the
+# coalescing window are merged into one frame (0 disables).
+WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "20"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+WS_COALESCE_MS = int(os.getenv("WS_COALESCE_MS", "50"))
+
+# Handlers marked @trusted_response already return exactly their
+# response_model's shape; with this on they are encoded straight to JSON
+# instead of being re-validated by FastAPI.
+SKIP_RESPONSE_VALIDATION = os.getenv("SKIP_RESPONSE_VALIDATION", "false").lower() in ("1", "true", "yes")
+
+# List endpoints read with a server-side projection that already has the
+# response shape and decode each batch from raw BSON in one call, instead of
+# going through per-document dicts and *_helper copies (needs MongoDB 4.4+).
+RAW_BSON_READS = os.getenv("RAW_BSON_READS", "false").lower() in ("1", "true", "yes")
+
+# Response compression: gzip always, brotli when the optional `brotli`
+# package is installed.  Only allowlisted content types ("type/" matches a
+# whole family) of at least COMPRESSION_MIN_SIZE bytes are compressed.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_TYPES = tuple(
+    t.strip() for t in os.getenv(
+        "COMPRESSION_TYPES",
+        "application/json,text/,application/javascript,application/xml,image/svg+xml",
+    ).split(",") if t.strip()
+)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Cache-Control sent with catalog reads (all of them also carry an ETag, so
+# clients/CDNs revalidate with a cheap conditional GET once these expire).
+CACHE_CONTROL_PRODUCT_LIST = os.getenv("CACHE_CONTROL_PRODUCT_LIST", "public, max-age=30")
+CACHE_CONTROL_PRODUCT = os.getenv("CACHE_CONTROL_PRODUCT", "public, max-age=60")
+CACHE_CONTROL_CATEGORIES = os.getenv("CACHE_CONTROL_CATEGORIES", "public, max-age=300")
+
+# Prometheus metrics at GET /metrics (request latency histograms, in-flight
+# gauges and every subsystem's stats).  With METRICS_TOKEN set, scrapes must
+# send "Authorization: Bearer <token>".
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Event-loop monitor: samples loop lag every LOOP_MONITOR_INTERVAL_MS and, when
+# the loop stays blocked for LOOP_BLOCK_THRESHOLD_MS, logs the stack of the
+# code blocking it (also kept for GET /admin/loop/stats).
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() in ("1", "true", "yes")
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
@@ -1,5 +1,205 @@
+# app/database.py
+"""
+The MongoDB client, built from the MONGO_* settings in app/config.py.
+
+`db` stays importable at module level (Motor connects lazily); the app
+lifespan calls `open_database()` to warm the pool up before serving and
+`close_database()` on shutdown.  `catalog_db` is the same database with the
+catalog read preference, for public catalog reads only.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.config import MONGO_URL
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
+
+from app.config import (
+    MONGO_CATALOG_READ_PREFERENCE,
+    MONGO_COMMAND_MONITORING,
+    MONGO_COMPRESSORS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_DB_NAME,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_URL,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
+from app.db_tracing import command_tracer
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+# Checkout wait buckets (ms) for the wait-time histogram.
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class PoolStats(ConnectionPoolListener):
+    """
+    Connection pool gauges and counters, fed by pymongo's pool events.
+    Events arrive on pymongo's own threads, hence the lock.
+    """
+
+    def __init__(self, max_pool_size: int = MONGO_MAX_POOL_SIZE):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.in_use_max = 0
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.checkout_failures: dict[str, int] = {}
+        self.pool_clears = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    # ─── LISTENER ───────────────────────────────────────────────────────────
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+            self.open = max(0, self.open - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        wait = getattr(event, "duration", None) or 0.0  # seconds, pymongo 4.7+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.in_use_max = max(self.in_use_max, self.in_use)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.wait_buckets[self._bucket(wait * 1000)] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    @staticmethod
+    def _bucket(wait_ms: float) -> int:
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                return i
+        return len(WAIT_BUCKETS_MS)
+
+    # ─── REPORT ─────────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        with self._lock:
+            labels = [f"<={b}ms" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open": self.open,
+                "in_use": self.in_use,
+                "in_use_max": self.in_use_max,
+                "utilization": round(self.in_use / self.max_pool_size, 3) if self.max_pool_size else None,
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "pool_clears": self.pool_clears,
+                "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+                "wait_ms_histogram": dict(zip(labels, self.wait_buckets)),
+            }
+
+
+pool_stats = PoolStats()
+
+
+def client_options() -> dict:
+    """
+    Keyword arguments for the client.  0 means "no limit" for the optional
+    timeouts, which pymongo spells None.
+    """
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS or None,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS or None,
+        "event_listeners": [pool_stats],
+    }
+    if MONGO_COMMAND_MONITORING:
+        options["event_listeners"].append(command_tracer)
+    compressors = [c.strip() for c in MONGO_COMPRESSORS.split(",") if c.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def catalog_read_preference():
+    try:
+        return READ_PREFERENCES[MONGO_CATALOG_READ_PREFERENCE]
+    except KeyError:
+        raise ValueError(
+            f"MONGO_CATALOG_READ_PREFERENCE must be one of {', '.join(READ_PREFERENCES)}"
+        ) from None
+
+
+client = AsyncIOMotorClient(MONGO_URL, **client_options())
+db = client[MONGO_DB_NAME]
+catalog_db = client.get_database(MONGO_DB_NAME, read_preference=catalog_read_preference())
+
+
+async def open_database(warm_connections: int = MONGO_MIN_POOL_SIZE) -> float:
+    """
+    Check the server is reachable and open `warm_connections` pooled
+    connections up front, so the first requests don't pay for connection
+    setup (TCP + TLS + auth handshakes).  Returns the time taken in ms.
+    """
+    start = time.perf_counter()
+    await client.admin.command("ping")
+    # Concurrent pings each need their own connection, which fills the pool.
+    if warm_connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(warm_connections)))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info("mongodb ready in %.1f ms (%d pooled connections)", elapsed_ms, pool_stats.open)
+    return elapsed_ms
+
 
-client = AsyncIOMotorClient(MONGO_URL)
-db = client["mini_amazon"]
+def close_database():
+    client.close()
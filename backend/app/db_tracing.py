@@ -0,0 +1,179 @@
+# app/db_tracing.py
+"""
+MongoDB command monitoring: per-command durations, a slow-command log with
+the filter shape, and attribution of every command to the request that
+issued it (reported in a Server-Timing header).
+
+Motor runs pymongo calls on executor threads with a copy of the caller's
+contextvars, so the listener can find the current request's `DbCallStats`
+through `current_db_stats`.
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from pymongo.monitoring import CommandListener
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import MONGO_SLOW_COMMAND_MS
+
+logger = logging.getLogger(__name__)
+
+
+class DbCallStats:
+    """
+    Round trips and time spent in MongoDB for one request (or one test
+    scope).  A scope opened inside another also counts towards its parent.
+    """
+
+    def __init__(self, parent: Optional["DbCallStats"] = None):
+        self.parent = parent
+        self.calls = 0
+        self.total_ms = 0.0
+        self.commands: list[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, command: str, ms: float):
+        with self._lock:
+            self.calls += 1
+            self.total_ms += ms
+            self.commands.append(command)
+        if self.parent is not None:
+            self.parent.record(command, ms)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.calls} calls"'
+
+
+current_db_stats: ContextVar[Optional[DbCallStats]] = ContextVar("current_db_stats", default=None)
+
+
+@contextmanager
+def db_call_scope() -> Iterator[DbCallStats]:
+    stats = DbCallStats(parent=current_db_stats.get())
+    token = current_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_db_stats.reset(token)
+
+
+# ─── FILTER SHAPES ───────────────────────────────────────────────────────────
+# Where each command keeps the part worth logging.
+SHAPE_FIELDS = ("filter", "query", "q", "pipeline", "sort", "updates", "deletes")
+
+
+def query_shape(value: Any) -> Any:
+    """
+    The structure of a filter with every literal replaced by "?", so slow
+    commands group by shape and logs don't carry customer data.
+    """
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(not isinstance(v, (dict, list, tuple)) for v in value):
+            return ["?"]  # $in lists etc.: one marker regardless of length
+        return [query_shape(v) for v in value]
+    return "?"
+
+
+def command_shape(command: dict) -> dict:
+    return {k: query_shape(command[k]) for k in SHAPE_FIELDS if k in command}
+
+
+# ─── LISTENER ────────────────────────────────────────────────────────────────
+class CommandTracer(CommandListener):
+    """
+    Per-command-name counts and durations, slow-command logging and
+    per-request attribution.  Callbacks run on pymongo's threads.
+    """
+
+    def __init__(self, slow_ms: float = MONGO_SLOW_COMMAND_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._started: dict[tuple, tuple[str, str, dict]] = {}
+        self.counts: dict[str, int] = {}
+        self.failures: dict[str, int] = {}
+        self.total_ms: dict[str, float] = {}
+        self.max_ms: dict[str, float] = {}
+        self.slow = 0
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        target = f"{event.database_name}.{collection}" if isinstance(collection, str) else event.database_name
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (event.command_name, target, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        name = event.command_name
+        ms = event.duration_micros / 1000
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.total_ms[name] = self.total_ms.get(name, 0.0) + ms
+            self.max_ms[name] = max(self.max_ms.get(name, 0.0), ms)
+            if failed:
+                self.failures[name] = self.failures.get(name, 0) + 1
+            slow = self.slow_ms and ms >= self.slow_ms
+            if slow:
+                self.slow += 1
+
+        request_stats = current_db_stats.get()
+        if request_stats is not None:
+            request_stats.record(name, ms)
+        if slow and started is not None:
+            _, target, command = started
+            logger.warning(
+                "slow mongodb %s on %s: %.1f ms%s shape=%s",
+                name, target, ms, " (failed)" if failed else "",
+                json.dumps(command_shape(command), default=str),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self.counts),
+                "failures": dict(self.failures),
+                "total_ms": {k: round(v, 3) for k, v in self.total_ms.items()},
+                "max_ms": {k: round(v, 3) for k, v in self.max_ms.items()},
+                "slow": self.slow,
+                "slow_threshold_ms": self.slow_ms,
+            }
+
+
+command_tracer = CommandTracer()
+
+
+class ServerTimingMiddleware:
+    """
+    Opens a DB call scope per HTTP request and reports it on the response
+    as `Server-Timing: db;dur=<ms>;desc="<n> calls"`.  Commands issued after
+    the response has started (streamed bodies) aren't included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with db_call_scope() as stats:
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
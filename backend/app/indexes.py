@@ -0,0 +1,167 @@
+# app/indexes.py
+"""
+Declarative MongoDB indexes for every collection the routes query.
+
+    python -m app.indexes           # create missing indexes, print timings
+    python -m app.indexes --check   # print explain() plans per route query,
+                                    # exit 1 if any of them is a COLLSCAN
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.config import IDEMPOTENCY_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Collection name -> indexes the routes rely on.
+INDEXES = {
+    "users": [
+        # get_current_user / login / signup look users up by email.
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "carts": [
+        # One cart per user; every cart route filters on user_email.
+        IndexModel([("user_email", ASCENDING)], name="user_email_unique", unique=True),
+    ],
+    "orders": [
+        # A user's order history, newest first, keyset-paginated on
+        # (created_at, _id) (also serves plain user_email lookups through
+        # its prefix).
+        IndexModel(
+            [("user_email", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_email_created_at_id",
+        ),
+        # Admin order filters and per-status dashboard counts.
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created_at"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "idempotency_keys": [
+        # One record per client key; the unique index is what serializes
+        # concurrent duplicates (see app/utils/idempotency.claim_key).
+        IndexModel([("user_email", ASCENDING), ("key", ASCENDING)], name="user_email_key_unique", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+    ],
+    "products": [
+        # Keyset pagination orders (see app/utils/pagination.PRODUCT_SORTS);
+        # descending sorts walk the same indexes backwards.
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+        IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price_id"),
+        # Filter-only product search.
+        IndexModel([("category", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="category_created_at_id"),
+        IndexModel([("in_stock", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="in_stock_created_at_id"),
+    ],
+}
+
+
+async def ensure_indexes(db) -> list[dict]:
+    """
+    Create any missing indexes and return one report row per index.
+
+    `create_indexes` is a no-op for an index that already exists with the
+    same definition, so this is cheap on every startup.  A failure (e.g. a
+    unique index over existing duplicates) is logged and reported instead of
+    stopping the app.
+    """
+    report = []
+    for collection, models in INDEXES.items():
+        for model in models:
+            name = model.document["name"]
+            start = time.perf_counter()
+            error = None
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as exc:
+                error = str(exc)
+                logger.error("index %s.%s failed: %s", collection, name, error)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            report.append({"collection": collection, "index": name, "ms": round(elapsed_ms, 1), "error": error})
+
+    total = sum(row["ms"] for row in report)
+    logger.info("ensured %d indexes in %.1f ms", len(report), total)
+    return report
+
+
+# ─── QUERY SHAPES ────────────────────────────────────────────────────────────
+# One entry per distinct route query: (label, collection, filter, sort).
+_NOW = datetime.utcnow()
+_OID = ObjectId()
+QUERY_SHAPES = [
+    ("auth.get_current_user", "users", {"email": "x@example.com"}, None),
+    ("cart.get_cart", "carts", {"user_email": "x@example.com"}, None),
+    ("orders.get_user_orders", "orders", {"user_email": "x@example.com"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("orders.get_order", "orders", {"_id": _OID, "user_email": "x@example.com"}, None),
+    ("admin.get_orders_by_status", "orders", {"status": "pending", "created_at": {"$gte": _NOW, "$lte": _NOW}}, None),
+    ("admin.get_orders_by_date", "orders", {"created_at": {"$gte": _NOW, "$lte": _NOW}}, None),
+    ("admin.stats_by_status", "orders", {"status": "pending"}, None),
+    ("orders.place_order (idempotency)", "idempotency_keys", {"user_email": "x@example.com", "key": "k"}, None),
+    ("products.get_all_products", "products", {}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ("products.get_all_products?sort=price", "products", {}, [("price", ASCENDING), ("_id", ASCENDING)]),
+    ("products.search_products?category", "products", {"category": "Books"}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ("products.search_products?in_stock", "products", {"in_stock": True}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ("products.search_products?price", "products", {"price": {"$gte": 1, "$lte": 10}}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ("products.search_products?q (page fetch)", "products", {"_id": {"$in": [_OID]}}, None),
+]
+
+
+def plan_stages(plan: dict) -> list[str]:
+    """
+    Flatten a winning plan into its stage names, outermost first.
+    """
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        for key in ("queryPlan", "inputStage"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+async def check_query_plans(db) -> bool:
+    ok = True
+    for label, collection, filter_, sort in QUERY_SHAPES:
+        cursor = db[collection].find(filter_)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        status = "OK"
+        if "COLLSCAN" in stages:
+            status, ok = "COLLSCAN", False
+        elif "SORT" in stages:
+            status = "IN-MEMORY SORT"
+        print(f"{status:<15} {label:<45} {' <- '.join(stages)}")
+    return ok
+
+
+async def main(check: bool):
+    from app.database import db
+
+    if check:
+        return 0 if await check_query_plans(db) else 1
+
+    for row in await ensure_indexes(db):
+        status = f"FAILED: {row['error']}" if row["error"] else "ok"
+        print(f"{row['collection']:<10} {row['index']:<30} {row['ms']:>8.1f} ms  {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="explain each route query shape instead")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check)))
@@ -0,0 +1,156 @@
+# app/loop_monitor.py
+"""
+Event-loop lag monitor and blocking-call detector.
+
+A sampler task sleeps for `interval` and records how late it wakes up (the
+loop's lag).  A watchdog thread watches the sampler's heartbeat: once the
+loop has been stuck for `block_threshold` it grabs the loop thread's stack
+- i.e. whatever is blocking it right now - and logs it.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from app.config import LOOP_BLOCK_THRESHOLD_MS, LOOP_MONITOR_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+STACK_LIMIT = 20
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval_ms: float = LOOP_MONITOR_INTERVAL_MS,
+        block_threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS,
+        keep_stalls: int = 20,
+    ):
+        self.interval = interval_ms / 1000
+        self.block_threshold = block_threshold_ms / 1000
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._captured_for = 0.0
+        self._open_stall: Optional[dict] = None
+
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+        self.lag_buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.stall_count = 0
+        self.stalls: deque[dict] = deque(maxlen=keep_stalls)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    # ─── LIFECYCLE ──────────────────────────────────────────────────────────
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # A block that ended just now hasn't been sampled yet: account for it.
+        self._record(max(0.0, time.monotonic() - self._heartbeat - self.interval))
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    # ─── SAMPLER (on the loop) ──────────────────────────────────────────────
+    async def _sample(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._record(max(0.0, now - self._heartbeat - self.interval))
+            self._heartbeat = now
+
+    def _record(self, lag: float):
+        with self._lock:
+            self.samples += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            self.lag_last = lag
+            self.lag_buckets[self._bucket(lag * 1000)] += 1
+            if self._open_stall is not None:
+                # The watchdog saw this block while it was still going on;
+                # now we know how long it lasted.
+                self._open_stall["blocked_ms"] = round(max(self._open_stall["blocked_ms"], lag * 1000), 1)
+                self._open_stall = None
+
+    @staticmethod
+    def _bucket(lag_ms: float) -> int:
+        for i, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                return i
+        return len(LAG_BUCKETS_MS)
+
+    # ─── WATCHDOG (own thread) ──────────────────────────────────────────────
+    def _watch(self):
+        check_every = max(self.block_threshold / 4, 0.005)
+        while not self._stop.wait(check_every):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.block_threshold or heartbeat == self._captured_for:
+                continue
+            self._captured_for = heartbeat  # one capture per stall
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame else ""
+            stall = {"at": time.time(), "blocked_ms": round(blocked * 1000, 1), "stack": stack}
+            with self._lock:
+                self.stall_count += 1
+                self.stalls.append(stall)
+                self._open_stall = stall
+            logger.warning("event loop blocked for %.0f ms (still blocked) at:\n%s", blocked * 1000, stack)
+
+    # ─── REPORT ─────────────────────────────────────────────────────────────
+    @property
+    def max_lag_ms(self) -> float:
+        return self.lag_max * 1000
+
+    def worst_stall(self) -> Optional[dict]:
+        with self._lock:
+            return max(self.stalls, key=lambda s: s["blocked_ms"], default=None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            labels = [f"<={b}ms" for b in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+            return {
+                "running": self.running,
+                "interval_ms": self.interval * 1000,
+                "block_threshold_ms": self.block_threshold * 1000,
+                "samples": self.samples,
+                "lag_ms_avg": round(self.lag_total / self.samples * 1000, 3) if self.samples else None,
+                "lag_ms_max": round(self.lag_max * 1000, 3),
+                "lag_ms_last": round(self.lag_last * 1000, 3),
+                "lag_ms_histogram": dict(zip(labels, self.lag_buckets)),
+                "stalls": self.stall_count,
+                "recent_stalls": list(self.stalls),
+            }
+
+
+loop_monitor = LoopMonitor()
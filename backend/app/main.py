@@ -1,9 +1,12 @@
 # app/main.py
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+from pymongo.errors import PyMongoError
+import hmac
+import logging
 import os
 
 from app.auth.routes import router as auth_router
@@ -12,12 +15,64 @@ from app.routes.product_routes import router as product_router
 from app.routes.order_routes import router as order_router
 from app.routes.admin_routes import router as admin_router
 from app.routes.ws_routes import router as ws_router
+from app.database import close_database, db, open_database, pool_stats
+from app.indexes import ensure_indexes
+from app.order_stats import ensure_counters
+from app.auth.dependencies import principal_cache, token_cache
+from app.auth.utils import password_pool
+from app.catalog_cache import catalog_cache
+from app.ws_backplane import backplane
+from app.ws_manager import manager
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.idempotency import REPLAYED_HEADER
+from app.utils.responses import FastJSONResponse
+from app.compression import CompressionMiddleware, PrecompressedStaticFiles, compression_stats
+from app.config import (
+    COMPRESSION_ENABLED,
+    LOOP_MONITOR_ENABLED,
+    METRICS_ENABLED,
+    METRICS_TOKEN,
+    SERVER_TIMING_ENABLED,
+)
+from app.loop_monitor import loop_monitor
+from app.db_tracing import ServerTimingMiddleware, command_tracer
+from app import metrics
 
 # ✅ Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger("app")
+
+# ✅ Startup / shutdown hooks
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    try:
+        await open_database()  # ping + pool warm-up (MONGO_MIN_POOL_SIZE)
+    except PyMongoError:
+        logger.exception("mongodb not reachable at startup; connecting lazily")
+    try:
+        await ensure_indexes(db)  # logs per-index failures and total build time
+    except PyMongoError:
+        logger.exception("could not ensure indexes; continuing without them")
+    try:
+        await ensure_counters(db)
+    except PyMongoError:
+        logger.exception("could not seed order counters")
+    try:
+        await backplane.start()
+    except Exception:
+        logger.exception("websocket backplane unavailable; delivering to local sockets only")
+    yield
+    await backplane.stop()
+    await manager.stop()
+    password_pool.shutdown()
+    close_database()
+    await loop_monitor.stop()
+
 # ✅ Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # ✅ Setup CORS
 origins = [
@@ -31,13 +86,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER, "Server-Timing"],
 )
 
+# ✅ Compress large JSON/text responses (skips anything already encoded)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# ✅ Server-Timing header with each request's MongoDB time and call count
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
 # ✅ Health check route
 @app.get("/")
 def read_root():
     return {"message": "Mini Amazon backend is live!"}
 
+# ✅ Prometheus metrics (added last, so it times the whole middleware stack)
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    for name, collect in {
+        "ws": manager.stats,
+        "ws_backplane": backplane.stats,
+        "catalog_cache": catalog_cache.stats,
+        "principal_cache": principal_cache.stats,
+        "token_cache": token_cache.stats,
+        "password_pool": password_pool.stats,
+        "compression": compression_stats.stats,
+        "db_pool": pool_stats.stats,
+        "db_commands": command_tracer.stats,
+        "event_loop": loop_monitor.stats,
+    }.items():
+        metrics.registry.add_collector(name, collect)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics(request: Request):
+        if METRICS_TOKEN:
+            supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+            if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+                raise HTTPException(status_code=401, detail="Invalid metrics token")
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # ✅ Register routers
 app.include_router(auth_router) 
 app.include_router(product_router)
@@ -48,4 +137,5 @@ app.include_router(ws_router)
 
 # ✅ Serve uploads directory as static files
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads")
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+# (serves <file>.br / <file>.gz sidecars when present: python -m app.compression uploads/)
+app.mount("/uploads", PrecompressedStaticFiles(directory=UPLOAD_DIR), name="uploads")
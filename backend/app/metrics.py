@@ -0,0 +1,217 @@
+# app/metrics.py
+"""
+Request metrics in Prometheus text format, without a client library.
+
+`MetricsMiddleware` records a latency histogram per route template, method
+and status plus in-flight gauges per router; `/metrics` renders those along
+with every subsystem's `stats()` dict (WebSocket manager, backplane, caches,
+password pool, compression, MongoDB pool) registered as collectors.
+"""
+
+import math
+import time
+from typing import Callable, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PREFIX = "mini_amazon"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the Prometheus client defaults.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# First path segment -> router label; anything else is "other" so a scan of
+# random URLs can't blow up label cardinality.
+ROUTERS = {"auth", "products", "cart", "orders", "admin", "ws", "uploads", "metrics"}
+
+
+def router_of(path: str) -> str:
+    segment = path.lstrip("/").split("/", 1)[0]
+    if not segment:
+        return "root"
+    return segment if segment in ROUTERS else "other"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series):
+                cumulative += count
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple, amount: float = 1):
+        self.inc(labels, -amount)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The app's own metrics plus named collectors: callables returning a
+    `stats()`-style dict.  Numeric values become `<prefix>_<collector>_<key>`
+    samples, one level of nested dicts becomes a `key` label, anything else
+    (names, None) is skipped.  Their counter/gauge nature isn't declared,
+    so they are exposed as untyped.
+    """
+
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self.request_latency = Histogram(
+            f"{prefix}_http_request_duration_seconds",
+            "HTTP request latency by route template, method and status.",
+            ("router", "route", "method", "status"),
+        )
+        self.in_flight = Gauge(
+            f"{prefix}_http_requests_in_flight",
+            "HTTP requests currently being served, by router.",
+            ("router",),
+        )
+        self.collectors: dict[str, Callable[[], dict]] = {}
+        self.collector_errors = 0
+
+    def add_collector(self, name: str, collect: Callable[[], dict]):
+        self.collectors[name] = collect
+
+    def _render_collector(self, name: str, stats: dict) -> list[str]:
+        lines = []
+        for key, value in stats.items():
+            metric = f"{self.prefix}_{name}_{key}"
+            if isinstance(value, dict):
+                samples = [
+                    f'{metric}{{key="{_escape(str(k))}"}} {_number(v)}'
+                    for k, v in value.items()
+                    if isinstance(v, (int, float)) and not isinstance(v, bool)
+                ]
+            elif isinstance(value, (int, float)):
+                samples = [f"{metric} {_number(int(value) if isinstance(value, bool) else value)}"]
+            else:
+                samples = []
+            if samples:
+                lines.append(f"# TYPE {metric} untyped")
+                lines.extend(samples)
+        return lines
+
+    def render(self) -> str:
+        lines = self.request_latency.render() + self.in_flight.render()
+        for name, collect in self.collectors.items():
+            try:
+                lines.extend(self._render_collector(name, collect()))
+            except Exception:
+                self.collector_errors += 1
+        lines.append(f"# TYPE {self.prefix}_metrics_collector_errors untyped")
+        lines.append(f"{self.prefix}_metrics_collector_errors {self.collector_errors}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def route_label(scope: Scope, router: str) -> str:
+    """
+    The matched route's path template (`/products/{product_id}`), or a
+    per-router wildcard for mounts and unmatched paths.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    return "/" if router == "root" else f"/{router}/*"
+
+
+class MetricsMiddleware:
+    """
+    Outermost middleware: times each HTTP request from the first byte in to
+    the last byte out (compression included).  WebSocket sessions are
+    covered by the manager's own gauges instead.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        router = router_of(scope["path"])
+        status: Optional[int] = None
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = self.registry.in_flight
+        in_flight.inc((router,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # No response started (unhandled error) counts as a 500.
+            in_flight.dec((router,))
+            self.registry.request_latency.observe(
+                (router, route_label(scope, router), scope["method"], str(status or 500)),
+                time.perf_counter() - start,
+            )
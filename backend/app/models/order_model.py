@@ -23,3 +23,51 @@ def order_helper(order) -> dict:
             for history in order.get("status_history", [])
         ]
     }
+
+
+def order_summary_helper(order) -> dict:
+    return {
+        "id": str(order["_id"]),
+        "total_price": order.get("total_price"),
+        "status": order.get("status"),
+        "created_at": order.get("created_at"),
+    }
+
+
+# Server-side projection of exactly what OrderResponse serves (no status
+# history), for app/utils/raw_bson.find_shaped.
+ORDER_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "user_email": {"$ifNull": ["$user_email", None]},
+    "total_price": {"$ifNull": ["$total_price", None]},
+    "status": {"$ifNull": ["$status", None]},
+    "created_at": {"$ifNull": ["$created_at", None]},
+    "items": {
+        "$map": {
+            "input": {"$ifNull": ["$items", []]},
+            "as": "item",
+            "in": {
+                "product_id": {"$ifNull": ["$$item.product_id", None]},
+                "quantity": {"$ifNull": ["$$item.quantity", None]},
+                "price_at_purchase": {"$ifNull": ["$$item.price_at_purchase", None]},
+            },
+        }
+    },
+}
+
+# The admin order list also serves the status history, shaped like
+# order_helper's.
+ADMIN_ORDER_PROJECTION = {
+    **ORDER_PROJECTION,
+    "status_history": {
+        "$map": {
+            "input": {"$ifNull": ["$status_history", []]},
+            "as": "history",
+            "in": {
+                "status": {"$ifNull": ["$$history.status", None]},
+                "timestamp": {"$ifNull": ["$$history.timestamp", None]},
+            },
+        }
+    },
+}
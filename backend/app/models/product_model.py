@@ -5,7 +5,24 @@ def product_helper(prod: dict) -> dict:
         "description": prod.get("description"),
         "price": prod["price"],
         "in_stock": prod.get("in_stock", True),
+        "stock": prod.get("stock"),
         "category": prod.get("category"),
         "image": prod.get("image", ""),
         "created_at": prod["created_at"],
     }
+
+
+# Server-side equivalent of product_helper, for find() projections
+# (see app/utils/raw_bson.find_shaped).
+PRODUCT_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "name": "$name",
+    "description": {"$ifNull": ["$description", None]},
+    "price": "$price",
+    "in_stock": {"$ifNull": ["$in_stock", True]},
+    "stock": {"$ifNull": ["$stock", None]},
+    "category": {"$ifNull": ["$category", None]},
+    "image": {"$ifNull": ["$image", ""]},
+    "created_at": "$created_at",
+}
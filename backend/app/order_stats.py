@@ -0,0 +1,110 @@
+# app/order_stats.py
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.config import ORDER_COUNTERS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+ORDER_STATUSES = ["pending", "shipped", "delivered", "cancelled"]
+# Bucket for orders whose status is missing or not in ORDER_STATUSES, so
+# they still add up to the total without adding arbitrary keys.
+OTHER_STATUS = "other"
+
+# The materialized counters live in one document of the `stats` collection.
+COUNTERS_ID = "orders"
+
+
+def status_bucket(status) -> str:
+    return status if status in ORDER_STATUSES else OTHER_STATUS
+
+
+async def count_orders_by_status(db) -> dict:
+    """
+    One pass over the orders: `$group` by status, sorted first so the
+    planner can answer it from the status_created_at index.
+    """
+    pipeline = [
+        {"$sort": {"status": 1}},
+        {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+    ]
+    counts = {status: 0 for status in ORDER_STATUSES + [OTHER_STATUS]}
+    async for row in db.orders.aggregate(pipeline):
+        counts[status_bucket(row["_id"])] += row["n"]
+    return counts
+
+
+
+async def read_counters(db) -> Optional[dict]:
+    return await db.stats.find_one({"_id": COUNTERS_ID}, {"_id": 0})
+
+
+async def rebuild_counters(db) -> dict:
+    """
+    Recompute the counters document from the orders collection.
+    """
+    by_status = await count_orders_by_status(db)
+    counters = {"total": sum(by_status.values()), "by_status": by_status}
+    await db.stats.replace_one({"_id": COUNTERS_ID}, counters, upsert=True)
+    return counters
+
+
+async def ensure_counters(db):
+    """
+    Seed the counters document on startup if it doesn't exist yet.
+    """
+    if ORDER_COUNTERS_ENABLED and await read_counters(db) is None:
+        await rebuild_counters(db)
+
+
+async def bump_order_counters(db, old_status: Optional[str], new_status: str):
+    """
+    Record a new order (`old_status` None) or a status change.  No upsert:
+    until the document has been seeded, increments are simply dropped.
+    """
+    if not ORDER_COUNTERS_ENABLED or old_status == new_status:
+        return
+    inc = {f"by_status.{status_bucket(new_status)}": 1}
+    if old_status is None:
+        inc["total"] = 1
+    else:
+        old = f"by_status.{status_bucket(old_status)}"
+        inc[old] = inc.get(old, 0) - 1
+    try:
+        await db.stats.update_one({"_id": COUNTERS_ID}, {"$inc": inc})
+    except Exception:
+        # The order itself is already written; a rebuild fixes any drift.
+        logger.warning("could not update order counters", exc_info=True)
+
+
+async def dashboard_stats(db, refresh: bool = False) -> dict:
+    """
+    Totals for the admin dashboard.  User/product totals come from
+    collection metadata; order counts from the counters document when
+    enabled, else from one aggregation.  All reads run concurrently.
+    """
+    if not ORDER_COUNTERS_ENABLED:
+        order_counts = count_orders_by_status(db)
+    elif refresh:
+        order_counts = rebuild_counters(db)
+    else:
+        order_counts = read_counters(db)
+
+    total_users, total_products, orders = await asyncio.gather(
+        db.users.estimated_document_count(),
+        db.products.estimated_document_count(),
+        order_counts,
+    )
+    if orders is None:  # counters enabled but not seeded yet
+        orders = await rebuild_counters(db)
+    if "by_status" not in orders:
+        orders = {"total": sum(orders.values()), "by_status": orders}
+
+    return {
+        "total_users": total_users,
+        "total_products": total_products,
+        "total_orders": orders["total"],
+        "orders_by_status": {status: orders["by_status"].get(status, 0) for status in ORDER_STATUSES},
+    }
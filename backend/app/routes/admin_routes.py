@@ -5,14 +5,26 @@ from typing import List, Optional
 from bson import ObjectId
 from datetime import datetime
 from pydantic import BaseModel
-from app.models.order_model import order_helper
-import os, shutil
+from app.models.order_model import ADMIN_ORDER_PROJECTION, order_helper
 
-from app.auth.dependencies import require_admin
-from app.database import db
+from app.auth.dependencies import require_admin, invalidate_principal, principal_cache, token_cache
+from app.auth.utils import password_pool
+from app.database import db, pool_stats
+from app.db_tracing import command_tracer
+from app.loop_monitor import loop_monitor
 from app.models.user_model import user_helper
 from app.schemas.user_schema import UserResponse
-from app.models.product_model import product_helper
+from app.models.product_model import PRODUCT_PROJECTION, product_helper
+from app.config import RAW_BSON_READS
+from app.utils.raw_bson import find_shaped
+from app.utils.uploads import save_upload
+from app.search_index import catalog_search
+from app.catalog_cache import catalog_cache
+from app.order_stats import dashboard_stats
+from app.ws_backplane import backplane
+from app.ws_manager import manager
+from app.compression import compression_stats
+from app.utils.responses import FastJSONRoute, trusted_response
 from app.schemas.product_schema import (
     ProductCreate,
     ProductUpdate,
@@ -22,7 +34,8 @@ from app.schemas.product_schema import (
 router = APIRouter(
     prefix="/admin",
     tags=["Admin"],
-    dependencies=[Depends(require_admin)]
+    dependencies=[Depends(require_admin)],
+    route_class=FastJSONRoute,
 )
 
 # ──────────────────────────────── UPLOAD IMAGE ────────────────────────────────
@@ -31,10 +44,7 @@ UPLOAD_DIR = "uploads/products"
 @router.post("/products/upload-image")
 async def admin_upload_image(file: UploadFile = File(...)):
     try:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await save_upload(file, UPLOAD_DIR)
         image_url = f"/uploads/products/{file.filename}"
         return {"url": image_url}
     except Exception as e:
@@ -42,28 +52,73 @@ async def admin_upload_image(file: UploadFile = File(...)):
 
 # ──────────────────────────────── ADMIN DASHBOARD STATS ────────────────────────────────
 @router.get("/stats")
-async def get_admin_stats():
-    total_users    = await db.users.count_documents({})
-    total_products = await db.products.count_documents({})
-    total_orders   = await db.orders.count_documents({})
-
-    statuses = ["pending", "shipped", "delivered", "cancelled"]
-    orders_by_status = {}
-    for s in statuses:
-        orders_by_status[s] = await db.orders.count_documents({"status": s})
+async def get_admin_stats(refresh: bool = Query(False, description="Recompute the order counters")):
+    return await dashboard_stats(db, refresh=refresh)
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Cache hit/miss/eviction counters, for monitoring.
+    """
     return {
-        "total_users": total_users,
-        "total_products": total_products,
-        "total_orders": total_orders,
-        "orders_by_status": orders_by_status,
+        "catalog": catalog_cache.stats(),
+        "principals": principal_cache.stats(),
+        "tokens": token_cache.stats(),
     }
 
+@router.get("/password-pool/stats")
+async def get_password_pool_stats():
+    """
+    Password hashing pool: in-flight/rejected calls, queue wait vs hash time.
+    """
+    return password_pool.stats()
+
+@router.get("/ws/stats")
+async def get_ws_stats():
+    """
+    WebSocket gauges (connected users/sockets, queued frames) and counters
+    (frames sent/dropped/coalesced, pings, reaped), plus backplane delivery.
+    """
+    return {"connections": manager.stats(), "backplane": backplane.stats()}
+
+@router.get("/compression/stats")
+async def get_compression_stats():
+    """
+    Compressed responses per coding, bytes in/out/saved, skips by reason and
+    precompressed static file hits.
+    """
+    return compression_stats.stats()
+
+@router.get("/db/pool/stats")
+async def get_db_pool_stats():
+    """
+    MongoDB connection pool for this worker: open/in-use connections,
+    utilization against maxPoolSize, checkout failures and wait times.
+    """
+    return pool_stats.stats()
+
+@router.get("/db/commands/stats")
+async def get_db_command_stats():
+    """
+    MongoDB commands issued by this worker: calls, failures, total and max
+    time per command name, and how many crossed the slow-command threshold.
+    """
+    return command_tracer.stats()
+
+@router.get("/loop/stats")
+async def get_loop_stats():
+    """
+    Event-loop lag (avg/max/histogram) and the most recent stalls with the
+    stack of the code that was blocking the loop.
+    """
+    return loop_monitor.stats()
+
 # ──────────────────────────────── USER MANAGEMENT ────────────────────────────────
 class RoleUpdate(BaseModel):
     is_admin: bool
 
 @router.get("/users", response_model=List[UserResponse])
+@trusted_response
 async def list_users(
     q: Optional[str] = Query(None, description="Filter by name or email"),
     page: int = Query(1, ge=1),
@@ -93,10 +148,12 @@ async def change_user_role(user_id: str, update: RoleUpdate):
         raise HTTPException(status_code=404, detail="User not found")
 
     updated = await db.users.find_one({"_id": oid})
+    invalidate_principal(updated["email"])
     return user_helper(updated)
 
 # ──────────────────────────────── PRODUCT MANAGEMENT ────────────────────────────────
 @router.get("/products", response_model=List[ProductResponse])
+@trusted_response
 async def list_products(
     q: Optional[str] = Query(None, description="Filter by product name"),
     page: int = Query(1, ge=1),
@@ -107,6 +164,9 @@ async def list_products(
     if q:
         query["name"] = {"$regex": q, "$options": "i"}
 
+    if RAW_BSON_READS:
+        return await find_shaped(db.products, query, PRODUCT_PROJECTION, skip=skip, limit=limit)
+
     cursor = db.products.find(query).skip(skip).limit(limit)
     out = [product_helper(p) async for p in cursor]
     return out
@@ -114,12 +174,17 @@ async def list_products(
 @router.post("/products", response_model=ProductResponse)
 async def create_product(product: ProductCreate):
     data = product.model_dump()
-    data["created_at"] = datetime.utcnow()
+    if data["stock"] is not None:
+        data["in_stock"] = data["stock"] > 0
+    data["created_at"] = data["updated_at"] = datetime.utcnow()
     result = await db.products.insert_one(data)
     new = await db.products.find_one({"_id": result.inserted_id})
+    catalog_search.index_product(new)
+    await catalog_cache.invalidate_product(categories=bool(new.get("category")))
     return product_helper(new)
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
+@trusted_response
 async def get_product_by_id(product_id: str):
     try:
         oid = ObjectId(product_id)
@@ -140,11 +205,16 @@ async def update_product(product_id: str, upd: ProductUpdate):
         raise HTTPException(status_code=400, detail="Invalid product ID")
 
     data = {k: v for k, v in upd.model_dump().items() if v is not None}
+    if "stock" in data:
+        data["in_stock"] = data["stock"] > 0
+    data["updated_at"] = datetime.utcnow()
     result = await db.products.update_one({"_id": oid}, {"$set": data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
 
     updated = await db.products.find_one({"_id": oid})
+    catalog_search.index_product(updated)
+    await catalog_cache.invalidate_product(product_id, categories="category" in data)
     return product_helper(updated)
 
 @router.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -157,6 +227,8 @@ async def delete_product(product_id: str):
     result = await db.products.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    catalog_search.remove_product(product_id)
+    await catalog_cache.invalidate_product(product_id)
     return
 
 # ──────────────────────────────── ORDER MANAGEMENT ────────────────────────────────
@@ -178,6 +250,9 @@ async def get_orders_by_status(
     if start and end:
         query["created_at"] = {"$gte": start, "$lte": end}
 
+    if RAW_BSON_READS:
+        return await find_shaped(db.orders, query, ADMIN_ORDER_PROJECTION, skip=(page - 1) * limit, limit=limit)
+
     cursor = db.orders.find(query).skip((page - 1) * limit).limit(limit)
     orders = [order_helper(order) async for order in cursor]
     return orders
@@ -2,15 +2,17 @@
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.schemas.user_schema import UserCreate, UserPublic, UserUpdateRequest, UserResponse
-from app.auth.utils import hash_password, verify_password, create_access_token
+from app.auth.utils import hash_password_async, verify_password_async, create_access_token
 from app.database import db
 from app.models.user_model import user_helper
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, invalidate_principal
+from app.utils.responses import FastJSONRoute
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=FastJSONRoute)
 
 
 @router.post("/signup", response_model=UserPublic)
@@ -21,13 +23,16 @@ async def signup(user: UserCreate):
 
     # 2) Hash password and build the document
     user_dict = user.model_dump()  # { name, email, password }
-    hashed = hash_password(user_dict.pop("password"))
+    hashed = await hash_password_async(user_dict.pop("password"))
     user_dict["hashed_password"] = hashed
     user_dict["created_at"] = datetime.utcnow()
     user_dict["is_admin"] = False        # <--- always default to False
 
     # 3) Insert into MongoDB & return helper’ed result
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:  # lost a signup race; unique index on email
+        raise HTTPException(status_code=400, detail="Email already registered")
     created = await db.users.find_one({"_id": result.inserted_id})
     return user_helper(created)
 
@@ -35,7 +40,7 @@ async def signup(user: UserCreate):
 @router.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = await db.users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     access_token = create_access_token(data={"sub": user["email"]})
@@ -72,7 +77,7 @@ async def update_current_user_info(
         update_data["name"] = update.name
 
     if update.password:
-        update_data["hashed_password"] = hash_password(update.password)
+        update_data["hashed_password"] = await hash_password_async(update.password)
 
     if not update_data:
         raise HTTPException(status_code=400, detail="No valid fields to update")
@@ -81,6 +86,7 @@ async def update_current_user_info(
         {"_id": ObjectId(current_user.id)},
         {"$set": update_data}
     )
+    invalidate_principal(current_user.email)
 
     updated = await db.users.find_one({"_id": ObjectId(current_user.id)})
     return user_helper(updated)
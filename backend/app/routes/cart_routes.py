@@ -2,6 +2,8 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from app.schemas.cart_schema import (
     CartAddRequest,
     CartUpdateRequest,
@@ -10,8 +12,9 @@ from app.schemas.cart_schema import (
 from app.auth.dependencies import get_current_user
 from app.models.cart_model import cart_helper
 from app.database import db
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter(prefix="/cart", tags=["Cart"])
+router = APIRouter(prefix="/cart", tags=["Cart"], route_class=FastJSONRoute)
 
 
 # ─── VIEW CART ────────────────────────────────────────────────────────────────────
@@ -29,6 +32,34 @@ async def get_cart(current_user=Depends(get_current_user)):
 
 
 # ─── ADD ITEM TO CART ────────────────────────────────────────────────────────────
+def add_item_pipeline(product_id: str, quantity: int) -> list:
+    """
+    Update pipeline that increments `product_id`'s quantity if it is already
+    in the cart and appends it otherwise.  Runs server-side in one atomic
+    write, so concurrent adds from several tabs can't lose increments.
+    """
+    pid = {"$literal": product_id}
+    items = {"$ifNull": ["$items", []]}
+    return [{
+        "$set": {
+            "items": {
+                "$cond": [
+                    {"$in": [pid, {"$map": {"input": items, "in": "$$this.product_id"}}]},
+                    {"$map": {
+                        "input": items,
+                        "in": {"$cond": [
+                            {"$eq": ["$$this.product_id", pid]},
+                            {"$mergeObjects": ["$$this", {"quantity": {"$add": ["$$this.quantity", quantity]}}]},
+                            "$$this",
+                        ]},
+                    }},
+                    {"$concatArrays": [items, [{"product_id": pid, "quantity": quantity}]]},
+                ]
+            }
+        }
+    }]
+
+
 @router.post("/add", response_model=CartResponse, status_code=status.HTTP_200_OK)
 async def add_to_cart(
     item: CartAddRequest,
@@ -38,37 +69,30 @@ async def add_to_cart(
     Add a product to the user's cart. If the cart doesn't exist, create it.
     If the product_id already exists, increment its quantity.
     """
-    cart = await db.carts.find_one({"user_email": current_user.email})
-
-    if not cart:
-        # Create a new cart document with this single item
-        new_cart = {
-            "user_email": current_user.email,
-            "items": [
-                {"product_id": item.product_id, "quantity": item.quantity}
-            ],
-        }
-        await db.carts.insert_one(new_cart)
-        return cart_helper(new_cart)
-
-    # Cart exists: check if this product_id is already in "items"
-    found = False
-    for existing_item in cart["items"]:
-        if existing_item["product_id"] == item.product_id:
-            existing_item["quantity"] += item.quantity
-            found = True
+    pipeline = add_item_pipeline(item.product_id, item.quantity)
+    for attempt in range(2):
+        try:
+            cart = await db.carts.find_one_and_update(
+                {"user_email": current_user.email},
+                pipeline,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
             break
+        except DuplicateKeyError:
+            # Two first-ever adds raced to create the cart; the unique index
+            # on user_email let one win, so retrying now updates that cart.
+            if attempt:
+                raise
 
-    if not found:
-        cart["items"].append({"product_id": item.product_id, "quantity": item.quantity})
+    return cart_helper(cart)
 
-    # Persist the updated "items" list
-    await db.carts.update_one(
-        {"user_email": current_user.email},
-        {"$set": {"items": cart["items"]}}
-    )
 
-    return cart_helper(cart)
+async def cart_missing_or_item_missing(email: str):
+    # Only reached on the error path, so the extra query is off the hot path.
+    if not await db.carts.count_documents({"user_email": email}, limit=1):
+        raise HTTPException(status_code=404, detail="Cart not found")
+    raise HTTPException(status_code=404, detail="Item not found in cart")
 
 
 # ─── UPDATE QUANTITY (OR REMOVE IF ZERO) ─────────────────────────────────────────
@@ -82,42 +106,19 @@ async def update_cart_item(
     If quantity == 0 → remove that product from the cart entirely.
     If the cart or item isn't found → return 404.
     """
-    cart = await db.carts.find_one({"user_email": current_user.email})
-    if not cart:
-        raise HTTPException(status_code=404, detail="Cart not found")
-
     # If the client sent quantity=0, remove that product from the array instead of setting zero
     if update.quantity == 0:
-        new_items = [item for item in cart["items"] if item["product_id"] != update.product_id]
-        if len(new_items) == len(cart["items"]):
-            # No change → that product_id was not in the cart
-            raise HTTPException(status_code=404, detail="Item not found in cart")
-
-        # Persist the filtered array
-        await db.carts.update_one(
-            {"user_email": current_user.email},
-            {"$set": {"items": new_items}}
-        )
-        updated_cart = {**cart, "items": new_items}
-        return cart_helper(updated_cart)
-
-    # Otherwise (quantity > 0), find and overwrite the item's quantity
-    updated = False
-    for idx, existing_item in enumerate(cart["items"]):
-        if existing_item["product_id"] == update.product_id:
-            cart["items"][idx]["quantity"] = update.quantity
-            updated = True
-            break
-
-    if not updated:
-        raise HTTPException(status_code=404, detail="Item not found in cart")
-
-    # Persist the new quantity
-    await db.carts.update_one(
-        {"user_email": current_user.email},
-        {"$set": {"items": cart["items"]}}
+        change = {"$pull": {"items": {"product_id": update.product_id}}}
+    else:
+        change = {"$set": {"items.$.quantity": update.quantity}}
+
+    cart = await db.carts.find_one_and_update(
+        {"user_email": current_user.email, "items.product_id": update.product_id},
+        change,
+        return_document=ReturnDocument.AFTER,
     )
-
+    if not cart:
+        await cart_missing_or_item_missing(current_user.email)
     return cart_helper(cart)
 
 
@@ -131,21 +132,14 @@ async def remove_from_cart(
     Remove exactly one product (matching product_id) from the user's cart.
     If the cart or item is not found, raises 404. Otherwise returns the updated cart.
     """
-    cart = await db.carts.find_one({"user_email": current_user.email})
-    if not cart:
-        raise HTTPException(status_code=404, detail="Cart not found")
-
-    new_items = [item for item in cart["items"] if item["product_id"] != product_id]
-    if len(new_items) == len(cart["items"]):
-        raise HTTPException(status_code=404, detail="Item not found in cart")
-
-    await db.carts.update_one(
-        {"user_email": current_user.email},
-        {"$set": {"items": new_items}}
+    cart = await db.carts.find_one_and_update(
+        {"user_email": current_user.email, "items.product_id": product_id},
+        {"$pull": {"items": {"product_id": product_id}}},
+        return_document=ReturnDocument.AFTER,
     )
-
-    updated_cart = {**cart, "items": new_items}
-    return cart_helper(updated_cart)
+    if not cart:
+        await cart_missing_or_item_missing(current_user.email)
+    return cart_helper(cart)
 
 
 # ─── CLEAR ENTIRE CART ───────────────────────────────────────────────────────────
@@ -1,77 +1,272 @@
 # app/routes/order_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from pydantic import Field
+from typing import Annotated, List, Optional, Union
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
 
-from app.ws_manager import manager
-from app.schemas.order_schema import OrderResponse, OrderStatusUpdate
-from app.models.order_model import order_helper
+from app.ws_backplane import backplane
+from app.schemas.order_schema import OrderDetail, OrderResponse, OrderStatusUpdate, OrderSummary
+from app.models.order_model import order_helper, order_summary_helper
 from app.auth.dependencies import get_current_user, require_admin
 from app.database import db
+from app.catalog_cache import catalog_cache
+from app.search_index import catalog_search
+from app.order_stats import ORDER_STATUSES, bump_order_counters
+from app.utils.pagination import ORDER_SORTS, next_cursor_for, paginate_query, set_next_cursor
+from app.utils.idempotency import (
+    IDEMPOTENCY_KEY_HEADER,
+    REPLAYED_HEADER,
+    claim_key,
+    complete_key,
+    release_key,
+)
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter(prefix="/orders", tags=["Orders"])
+router = APIRouter(prefix="/orders", tags=["Orders"], route_class=FastJSONRoute)
 
 # ───────────────────────────────────────────────────────────────────────────────
 
-@router.post("/", response_model=OrderResponse, status_code=201)
-async def place_order(current_user=Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_email": current_user.email})
-    if not cart or not cart.get("items"):
-        raise HTTPException(status_code=400, detail="Cart is empty")
+async def price_cart(products, cart_items: list) -> tuple[list, float, dict]:
+    """
+    Price every cart line with one `$in` query against `products`.
+    Raises 404 naming the first product that doesn't exist.  Also returns
+    the quantities to reserve, keyed by ObjectId, for stock-tracked products.
+    """
+    oids = {}
+    for ci in cart_items:
+        try:
+            oids[ci["product_id"]] = ObjectId(ci["product_id"])
+        except InvalidId:
+            raise HTTPException(status_code=404, detail=f"Product {ci['product_id']} not found")
+
+    found = {
+        p["_id"]: p
+        async for p in products.find({"_id": {"$in": list(set(oids.values()))}}, {"price": 1, "stock": 1})
+    }
 
     order_items = []
     total_price = 0.0
-
-    for ci in cart["items"]:
-        prod = await db.products.find_one({"_id": ObjectId(ci["product_id"])})
-        if not prod:
+    reservations = {}
+    for ci in cart_items:
+        oid = oids[ci["product_id"]]
+        prod = found.get(oid)
+        if prod is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Product {ci['product_id']} not found"
             )
-        price = prod["price"]
         qty = ci["quantity"]
         order_items.append({
             "product_id": ci["product_id"],
             "quantity": qty,
-            "price_at_purchase": price,
+            "price_at_purchase": prod["price"],
         })
-        total_price += price * qty
+        total_price += prod["price"] * qty
+        if prod.get("stock") is not None:
+            reservations[oid] = reservations.get(oid, 0) + qty
+    return order_items, total_price, reservations
+
+# ───────────────────────────────────────────────────────────────────────────────
+
+def stock_change(delta: int) -> list:
+    """
+    Update pipeline adding `delta` to `stock`, re-deriving `in_stock` and
+    bumping `updated_at` (the product's Last-Modified).
+    """
+    new_stock = {"$add": ["$stock", delta]}
+    return [{"$set": {
+        "stock": new_stock,
+        "in_stock": {"$gt": [new_stock, 0]},
+        "updated_at": "$$NOW",
+    }}]
+
+
+async def release_stock(products, reservations: dict) -> list[ObjectId]:
+    """
+    Put reserved units back (failed checkout or cancelled order).
+    Returns the products that just came back into stock.
+    """
+    async def put_back(oid, qty):
+        return await products.find_one_and_update(
+            {"_id": oid, "stock": {"$type": "number"}},
+            stock_change(qty),
+            projection={"stock": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    docs = await asyncio.gather(*(put_back(oid, qty) for oid, qty in reservations.items()))
+    return [doc["_id"] for doc in docs if doc and doc["stock"] == reservations[doc["_id"]]]
+
+
+async def reserve_stock(products, reservations: dict) -> list[ObjectId]:
+    """
+    Take every reservation or none of them.  Each decrement only matches
+    while `stock >= qty`, so concurrent buyers can never push a product
+    below zero; if any line can't be filled, the lines already taken are
+    released again and the checkout fails with 409.
+    Returns the products that just sold out.
+    """
+    async def take(oid, qty):
+        return await products.find_one_and_update(
+            {"_id": oid, "stock": {"$gte": qty}},
+            stock_change(-qty),
+            projection={"stock": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    lines = list(reservations.items())
+    docs = await asyncio.gather(*(take(oid, qty) for oid, qty in lines))
+
+    short = [oid for (oid, _), doc in zip(lines, docs) if doc is None]
+    if short:
+        taken = {oid: qty for (oid, qty), doc in zip(lines, docs) if doc is not None}
+        await sync_stock_caches(taken, await release_stock(products, taken), in_stock=True)
+        raise HTTPException(status_code=409, detail=f"Insufficient stock for product {short[0]}")
+    return [doc["_id"] for doc in docs if doc["stock"] == 0]
+
+
+async def sync_stock_caches(changed, flipped: list, in_stock: bool):
+    """
+    Stock counts show up in cached product documents, so those are dropped.
+    Cached listings only need to go when a product crossed zero, since
+    that's when in_stock filters change membership.
+    """
+    for oid in changed:
+        await catalog_cache.invalidate_product(str(oid), categories=False, queries=False)
+    for oid in flipped:
+        catalog_search.set_in_stock(str(oid), in_stock)
+    if flipped:
+        await catalog_cache.invalidate_product(categories=False)
+
+
+@router.post("/", response_model=OrderResponse, status_code=201)
+async def place_order(
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER),
+    current_user=Depends(get_current_user),
+):
+    """
+    With an Idempotency-Key header, retries of the same request return the
+    first response instead of placing another order.
+    """
+    if not idempotency_key:
+        return await create_order(current_user.email)
+
+    stored = await claim_key(db.idempotency_keys, current_user.email, idempotency_key)
+    if stored is not None:
+        response.headers[REPLAYED_HEADER] = "true"
+        return stored
+
+    try:
+        order = await create_order(current_user.email)
+    except BaseException:
+        await release_key(db.idempotency_keys, current_user.email, idempotency_key)
+        raise
+    await complete_key(db.idempotency_keys, current_user.email, idempotency_key, order)
+    return order
+
 
+async def create_order(user_email: str) -> dict:
+    cart = await db.carts.find_one({"user_email": user_email})
+    if not cart or not cart.get("items"):
+        raise HTTPException(status_code=400, detail="Cart is empty")
+
+    order_items, total_price, reservations = await price_cart(db.products, cart["items"])
+    if reservations:
+        sold_out = await reserve_stock(db.products, reservations)
+        await sync_stock_caches(reservations, sold_out, in_stock=False)
+
+    now = datetime.utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)  # BSON keeps ms
     new_order = {
-        "user_email": current_user.email,
+        "user_email": user_email,
         "items": order_items,
         "total_price": total_price,
         "status": "pending",
-        "created_at": datetime.utcnow(),
+        "created_at": now,
         "status_history": [
             {
                 "status": "pending",
-                "timestamp": datetime.utcnow()
+                "timestamp": now
             }
         ]
     }
-    result = await db.orders.insert_one(new_order)
-    saved = await db.orders.find_one({"_id": result.inserted_id})
+    if reservations:
+        # Kept so a cancellation knows exactly what to put back.
+        new_order["stock_reservations"] = [
+            {"product_id": oid, "quantity": qty} for oid, qty in reservations.items()
+        ]
+    # insert_one sets new_order["_id"], so there's no need to read it back
+    try:
+        await db.orders.insert_one(new_order)
+    except Exception:
+        if reservations:
+            await sync_stock_caches(reservations, await release_stock(db.products, reservations), in_stock=True)
+        raise
+    await bump_order_counters(db, None, "pending")
 
     await db.carts.update_one(
-        {"user_email": current_user.email},
+        {"user_email": user_email},
         {"$set": {"items": []}}
     )
 
-    return order_helper(saved)
+    return order_helper(new_order)
+
+# ───────────────────────────────────────────────────────────────────────────────
+
+# Summary rows never need the items or the (unbounded) status history.
+ORDER_VIEWS = {
+    "summary": ({"total_price": 1, "status": 1, "created_at": 1}, order_summary_helper),
+    "full": ({"status_history": 0, "stock_reservations": 0}, order_helper),
+}
+
+OrderListItem = Annotated[Union[OrderResponse, OrderSummary], Field(union_mode="left_to_right")]
+
+
+@router.get("/", response_model=List[OrderListItem])
+async def get_user_orders(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    view: str = Query("full", pattern="^(summary|full)$"),
+    current_user=Depends(get_current_user),
+):
+    """
+    The user's orders, newest first, one keyset page at a time.
+    """
+    sort = "-created_at"
+    projection, shape = ORDER_VIEWS[view]
+    query = paginate_query({"user_email": current_user.email}, sort, cursor, ORDER_SORTS)
+    docs = await (
+        db.orders.find(query, projection)
+        .sort(ORDER_SORTS[sort])
+        .limit(limit)
+        .to_list(length=limit)
+    )
+    set_next_cursor(response, next_cursor_for(docs, sort, limit, ORDER_SORTS))
+    return [shape(order) for order in docs]
 
 # ───────────────────────────────────────────────────────────────────────────────
 
-@router.get("/", response_model=List[OrderResponse])
-async def get_user_orders(current_user=Depends(get_current_user)):
-    cursor = db.orders.find({"user_email": current_user.email})
-    orders: List[OrderResponse] = []
-    async for order in cursor:
-        orders.append(order_helper(order))
-    return orders
+@router.get("/{order_id}", response_model=OrderDetail)
+async def get_order(order_id: str, current_user=Depends(get_current_user)):
+    try:
+        oid = ObjectId(order_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    order = await db.orders.find_one(
+        {"_id": oid, "user_email": current_user.email},
+        {"stock_reservations": 0},
+    )
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order_helper(order)
 
 # ───────────────────────────────────────────────────────────────────────────────
 
@@ -86,16 +281,25 @@ async def update_order_status(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid order ID format")
 
-    order_doc = await db.orders.find_one({"_id": oid})
-    if not order_doc:
-        raise HTTPException(status_code=404, detail="Order not found")
-
-    VALID_STATUSES = ["pending", "shipped", "delivered", "cancelled"]
-    if update.status not in VALID_STATUSES:
+    if update.status not in ORDER_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status value")
 
-    # ✅ UPDATED HERE — log status history
-    await db.orders.update_one(
+    if update.status == "cancelled":
+        # Claim the reservations atomically so stock is only returned once,
+        # however many times the order is cancelled.
+        claimed = await db.orders.find_one_and_update(
+            {"_id": oid, "stock_reservations": {"$exists": True}},
+            {"$unset": {"stock_reservations": ""}},
+            projection={"stock_reservations": 1},
+        )
+        if claimed:
+            reservations = {r["product_id"]: r["quantity"] for r in claimed["stock_reservations"]}
+            restocked = await release_stock(db.products, reservations)
+            await sync_stock_caches(reservations, restocked, in_stock=True)
+
+    # ✅ UPDATED HERE — log status history.  The pre-image gives us the old
+    # status for the counters; the response doesn't carry the history.
+    before = await db.orders.find_one_and_update(
         {"_id": oid},
         {
             "$set": {"status": update.status},
@@ -105,14 +309,18 @@ async def update_order_status(
                     "timestamp": datetime.utcnow()
                 }
             }
-        }
+        },
+        projection={"status_history": 0, "stock_reservations": 0},
+        return_document=ReturnDocument.BEFORE,
     )
+    if not before:
+        raise HTTPException(status_code=404, detail="Order not found")
+    await bump_order_counters(db, before.get("status"), update.status)
 
-    updated_doc = await db.orders.find_one({"_id": oid})
-    order_obj = order_helper(updated_doc)
+    order_obj = order_helper({**before, "status": update.status})
 
-    await manager.push_update(
-        updated_doc["user_email"],
+    await backplane.publish(
+        before["user_email"],
         {
             "type": "order_update",
             "order_id": order_id,
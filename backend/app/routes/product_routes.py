@@ -1,17 +1,36 @@
 # app/routes/product_routes.py
 
-from fastapi import APIRouter, HTTPException, Query, Depends, status, UploadFile, File
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, status, UploadFile, File
 from typing import Optional, List
 from bson import ObjectId
 from datetime import datetime
-import os, shutil
 
 from app.auth.dependencies import require_admin
 from app.schemas.product_schema import ProductCreate, ProductUpdate, ProductResponse
-from app.models.product_model import product_helper
-from app.database import db
+from app.config import (
+    CACHE_CONTROL_CATEGORIES,
+    CACHE_CONTROL_PRODUCT,
+    CACHE_CONTROL_PRODUCT_LIST,
+    RAW_BSON_READS,
+)
+from app.models.product_model import PRODUCT_PROJECTION, product_helper
+from app.database import catalog_db
+from app.search_index import catalog_search, tokenize
+from app.catalog_cache import catalog_cache
+from app.utils.http_cache import conditional_response, make_etag
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    PRODUCT_SORTS,
+    decode_offset_cursor,
+    encode_cursor,
+    next_cursor_for,
+    paginate_query,
+)
+from app.utils.raw_bson import find_shaped
+from app.utils.uploads import save_upload
+from app.utils.responses import FastJSONRoute, dumps
 
-router = APIRouter(prefix="/products", tags=["Products"])
+router = APIRouter(prefix="/products", tags=["Products"], route_class=FastJSONRoute)
 
 UPLOAD_DIR = "uploads/products"
 
@@ -19,10 +38,7 @@ UPLOAD_DIR = "uploads/products"
 @router.post("/upload-image", dependencies=[Depends(require_admin)])
 async def upload_image(file: UploadFile = File(...)):
     try:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await save_upload(file, UPLOAD_DIR)
         image_url = f"/uploads/products/{file.filename}"
         return {"url": image_url}
     except Exception as e:
@@ -30,32 +46,119 @@ async def upload_image(file: UploadFile = File(...)):
 
 # ──────────────────────────────── CATEGORIES ────────────────────────────────
 @router.get("/categories", response_model=List[str])
-async def list_categories():
-    cats = await db.products.distinct("category")
-    return [c for c in cats if c]
+async def list_categories(request: Request):
+    cats = await catalog_cache.get_categories()
+    if cats is None:
+        cats = await catalog_db.products.distinct("category")
+        cats = [c for c in cats if c]
+        await catalog_cache.set_categories(cats)
+    body = dumps(cats)
+    return conditional_response(request, body, make_etag(body), CACHE_CONTROL_CATEGORIES)
 
 # ──────────────────────────────── GET ALL ────────────────────────────────
+SORT_PATTERN = "^-?(created_at|price)$"
+
+async def fetch_product_page(query: dict, sort: str, cursor: Optional[str], page: int, limit: int):
+    """
+    Keyset page when `cursor` is given, else the legacy `page` offset (kept
+    for old clients).  Returns the shaped products and the next cursor.
+    """
+    query = paginate_query(query, sort, cursor)
+    skip = 0 if cursor else (page - 1) * limit
+    if RAW_BSON_READS:
+        docs = await find_shaped(catalog_db.products, query, PRODUCT_PROJECTION, PRODUCT_SORTS[sort], skip, limit)
+        return docs, next_cursor_for(docs, sort, limit)
+
+    find = catalog_db.products.find(query).sort(PRODUCT_SORTS[sort])
+    if skip:
+        find = find.skip(skip)
+    docs = await find.limit(limit).to_list(length=limit)
+    return [product_helper(p) for p in docs], next_cursor_for(docs, sort, limit)
+
+def encode_page(items: list, next_cursor: Optional[str]) -> dict:
+    """
+    What list/search pages cache: the encoded body and its ETag, so a hit
+    (and every 304) skips serialization entirely.
+    """
+    body = dumps(items)
+    return {"body": body, "etag": make_etag(body), "next_cursor": next_cursor}
+
+def page_response(request: Request, page: dict) -> Response:
+    headers = {NEXT_CURSOR_HEADER: page["next_cursor"]} if page["next_cursor"] else None
+    return conditional_response(request, page["body"], page["etag"], CACHE_CONTROL_PRODUCT_LIST, headers=headers)
+
 @router.get("/", response_model=List[ProductResponse])
-async def get_all_products(page: int = 1, limit: int = 12):
-    skip = (page - 1) * limit
-    cursor = db.products.find().skip(skip).limit(limit)
-    results = [product_helper(p) async for p in cursor]
-    return results
+async def get_all_products(
+    request: Request,
+    page: int = Query(1, ge=1),
+    limit: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    sort: str = Query("created_at", pattern=SORT_PATTERN),
+):
+    params = dict(sort=sort, cursor=cursor, page=None if cursor else page, limit=limit)
+    cached = await catalog_cache.get_query("list", **params)
+    if cached is None:
+        results, next_cursor = await fetch_product_page({}, sort, cursor, page, limit)
+        cached = encode_page(results, next_cursor)
+        await catalog_cache.set_query("list", cached, **params)
+    return page_response(request, cached)
 
 # ──────────────────────────────── SEARCH ────────────────────────────────
 @router.get("/search", response_model=List[ProductResponse])
 async def search_products(
+    request: Request,
     q: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
     in_stock: Optional[bool] = Query(None),
     category: Optional[str] = Query(None),
-    page: int = 1,
-    limit: int = 12,
+    page: int = Query(1, ge=1),
+    limit: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    sort: str = Query("created_at", pattern=SORT_PATTERN),
 ):
+    terms = tokenize(q)
+    params = dict(
+        q=" ".join(terms) or None, min_price=min_price, max_price=max_price,
+        in_stock=in_stock, category=category,
+        sort=None if terms else sort, cursor=cursor,
+        page=None if cursor else page, limit=limit,
+    )
+    cached = await catalog_cache.get_query("search", **params)
+    if cached is None:
+        results, next_cursor = await run_search(
+            terms, min_price, max_price, in_stock, category, sort, cursor, page, limit
+        )
+        cached = encode_page(results, next_cursor)
+        await catalog_cache.set_query("search", cached, **params)
+    return page_response(request, cached)
+
+async def run_search(terms, min_price, max_price, in_stock, category, sort, cursor, page, limit):
+    # Text queries are answered by the inverted index (ranked by relevance,
+    # so `sort` does not apply); only the page's documents come from MongoDB.
+    # Their cursor carries the rank offset, which costs nothing in MongoDB.
+    if terms:
+        skip = decode_offset_cursor(cursor) if cursor else (page - 1) * limit
+        ranked = await catalog_search.search(
+            catalog_db, " ".join(terms),
+            min_price=min_price, max_price=max_price,
+            in_stock=in_stock, category=category,
+            limit=limit, offset=skip,
+        )
+        if not ranked:
+            return [], None
+        next_cursor = None
+        if len(ranked) == limit:
+            next_cursor = encode_cursor({"s": "relevance", "o": skip + limit})
+        ids = [ObjectId(doc_id) for doc_id, _ in ranked]
+        if RAW_BSON_READS:
+            shaped = await find_shaped(catalog_db.products, {"_id": {"$in": ids}}, PRODUCT_PROJECTION)
+            docs = {p["id"]: p for p in shaped}
+        else:
+            docs = {str(p["_id"]): product_helper(p) async for p in catalog_db.products.find({"_id": {"$in": ids}})}
+        return [docs[doc_id] for doc_id, _ in ranked if doc_id in docs], next_cursor
+
     query: dict = {}
-    if q:
-        query["name"] = {"$regex": q, "$options": "i"}
     if min_price is not None or max_price is not None:
         pf: dict = {}
         if min_price is not None: pf["$gte"] = min_price
@@ -64,18 +167,28 @@ async def search_products(
     if in_stock is not None: query["in_stock"] = in_stock
     if category: query["category"] = category
 
-    skip = (page - 1) * limit
-    cursor = db.products.find(query).skip(skip).limit(limit)
-    results = [product_helper(p) async for p in cursor]
-    return results
+    return await fetch_product_page(query, sort, cursor, page, limit)
 
 # ──────────────────────────────── GET SINGLE PUBLIC (this is the fix 🔥) ────────────────────────────────
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: str):
+async def get_product(product_id: str, request: Request):
     try:
-        prod = await db.products.find_one({"_id": ObjectId(product_id)})
+        oid = ObjectId(product_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid product ID format")
-    if not prod:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product_helper(prod)
+
+    cached = await catalog_cache.get_product(product_id)
+    if cached is None:
+        prod = await catalog_db.products.find_one({"_id": oid})
+        if not prod:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = dumps(product_helper(prod))
+        cached = {
+            "body": body,
+            "etag": make_etag(body),
+            "last_modified": prod.get("updated_at") or prod.get("created_at"),
+        }
+        await catalog_cache.set_product(product_id, cached)
+    return conditional_response(
+        request, cached["body"], cached["etag"], CACHE_CONTROL_PRODUCT, cached["last_modified"]
+    )
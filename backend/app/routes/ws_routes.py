@@ -5,14 +5,15 @@ router = APIRouter()
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    conn = await manager.connect(websocket)
+    if conn is None:
+        return
 
     try:
         while True:
-            await websocket.receive_text()  # Keep connection alive
+            await websocket.receive_text()  # pongs and anything else count as liveness
+            manager.touch(conn)
     except WebSocketDisconnect:
-        # On disconnect, we remove user
-        for email, ws in manager.active_connections.items():
-            if ws == websocket:
-                manager.disconnect(email)
-                break
+        pass
+    finally:
+        manager.disconnect(conn)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from pydantic import ConfigDict
 
@@ -22,6 +22,22 @@ class OrderResponse(BaseModel):
         model_config = ConfigDict(from_attributes=True)
 
 
+class OrderSummary(BaseModel):
+    id: str
+    total_price: float
+    status: str
+    created_at: datetime
+
+
+class StatusHistoryEntry(BaseModel):
+    status: str
+    timestamp: Optional[datetime] = None
+
+
+class OrderDetail(OrderResponse):
+    status_history: List[StatusHistoryEntry] = []
+
+
 class OrderStatusUpdate(BaseModel):
     status: str  # e.g., "shipped", "delivered"
 
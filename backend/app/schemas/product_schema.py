@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 
@@ -8,6 +8,7 @@ class ProductBase(BaseModel):
     description: Optional[str] = None
     price: float
     in_stock: bool = True
+    stock: Optional[int] = Field(None, ge=0)  # None = not tracked; in_stock is derived when set
     category: Optional[str] = None
     image: Optional[str] = None  # <-- 🔥 ADD THIS 🔥
 
@@ -20,6 +21,7 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     price: Optional[float] = None
     in_stock: Optional[bool] = None
+    stock: Optional[int] = Field(None, ge=0)
     category: Optional[str] = None
     image: Optional[str] = None
 
@@ -0,0 +1,434 @@
+# app/search_index.py
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Optional
+
+from app.config import SEARCH_INDEX_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Field weights for BM25F-style scoring: a hit in the name counts more than a
+# hit in the category, which counts more than one buried in the description.
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+class ProductSearchIndex:
+    """
+    In-memory inverted index over product name, description and category.
+
+    Postings map a term to {product_id: weighted term frequency}.  The
+    price/stock/category filters are kept as side indexes so they can be
+    intersected with the text candidates without touching MongoDB.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, dict[str, float]] = defaultdict(dict)
+        self.doc_terms: dict[str, set[str]] = {}
+        self.doc_len: dict[str, float] = {}
+        self.total_len = 0.0
+
+        self.doc_meta: dict[str, tuple] = {}  # id -> (price, in_stock, category)
+        self.by_category: dict[str, set[str]] = defaultdict(set)
+        self.in_stock: set[str] = set()
+        self.by_price: list[tuple[float, str]] = []
+        self._price_dirty = False
+
+        self._vocab: list[str] = []
+        self._vocab_dirty = False
+        self._impact_cache: dict[str, list[tuple[float, str]]] = {}
+        self._impact_avgdl = 0.0
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    # ─── MAINTENANCE ────────────────────────────────────────────────────────
+    def add(self, prod: dict):
+        """
+        Index (or re-index) a raw product document.
+        """
+        doc_id = str(prod["_id"])
+        if doc_id in self.doc_len:
+            self.remove(doc_id)
+
+        weighted_tf: dict[str, float] = defaultdict(float)
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(prod.get(field)):
+                weighted_tf[term] += weight
+                length += weight
+
+        self.doc_len[doc_id] = length
+        self.total_len += length
+        for term, tf in weighted_tf.items():
+            if term not in self.postings:
+                self._vocab_dirty = True
+            self.postings[term][doc_id] = tf
+            impacts = self._impact_cache.get(term)
+            if impacts is not None:
+                insort(impacts, (-self._tf_score(tf, doc_id, self._impact_avgdl), doc_id))
+        self.doc_terms[doc_id] = set(weighted_tf)
+
+        price = float(prod.get("price") or 0.0)
+        in_stock = prod.get("in_stock", True)
+        category = prod.get("category")
+        self.doc_meta[doc_id] = (price, in_stock, category)
+        if category:
+            self.by_category[category].add(doc_id)
+        if in_stock:
+            self.in_stock.add(doc_id)
+        self.by_price.append((price, doc_id))
+        self._price_dirty = True
+
+    def remove(self, doc_id: str):
+        if doc_id not in self.doc_len:
+            return
+
+        for term in self.doc_terms.pop(doc_id):
+            posting = self.postings[term]
+            tf = posting.pop(doc_id)
+            impacts = self._impact_cache.get(term)
+            if impacts is not None:
+                entry = (-self._tf_score(tf, doc_id, self._impact_avgdl), doc_id)
+                i = bisect_left(impacts, entry)
+                if i < len(impacts) and impacts[i] == entry:
+                    del impacts[i]
+            if not posting:
+                del self.postings[term]
+                self._impact_cache.pop(term, None)
+                self._vocab_dirty = True
+        self.total_len -= self.doc_len.pop(doc_id)
+
+        price, in_stock, category = self.doc_meta.pop(doc_id)
+        if category:
+            self.by_category[category].discard(doc_id)
+            if not self.by_category[category]:
+                del self.by_category[category]
+        self.in_stock.discard(doc_id)
+        self._sorted_prices()
+        i = bisect_left(self.by_price, (price, doc_id))
+        if i < len(self.by_price) and self.by_price[i] == (price, doc_id):
+            del self.by_price[i]
+
+    def set_in_stock(self, doc_id: str, in_stock: bool):
+        meta = self.doc_meta.get(doc_id)
+        if meta is None:
+            return
+        self.doc_meta[doc_id] = (meta[0], in_stock, meta[2])
+        if in_stock:
+            self.in_stock.add(doc_id)
+        else:
+            self.in_stock.discard(doc_id)
+
+    # ─── QUERY ──────────────────────────────────────────────────────────────
+    def _expand(self, token: str, prefix: bool) -> list[str]:
+        if not prefix:
+            return [token] if token in self.postings else []
+        if self._vocab_dirty:
+            self._vocab = sorted(self.postings)
+            self._vocab_dirty = False
+        i = bisect_left(self._vocab, token)
+        out = []
+        while i < len(self._vocab) and self._vocab[i].startswith(token):
+            out.append(self._vocab[i])
+            if len(out) >= MAX_PREFIX_EXPANSIONS:
+                break
+            i += 1
+        return out
+
+    def warm(self):
+        """
+        Do the deferred sorting up front, e.g. right after a bulk build.
+        """
+        self._sorted_prices()
+        self._expand("", prefix=True)
+
+    def _sorted_prices(self) -> list[tuple[float, str]]:
+        # Appends are cheap while bulk-loading; sort once on the next read.
+        if self._price_dirty:
+            self.by_price.sort()
+            self._price_dirty = False
+        return self.by_price
+
+    def _idf(self, term: str) -> float:
+        n = len(self.doc_len)
+        df = len(self.postings[term])
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _impacts(self, term: str, avgdl: float) -> list[tuple[float, str]]:
+        """
+        Postings of `term` as `(-tf_score, doc_id)`, best first.  Built on
+        first use, then kept up to date by `add`/`remove`.
+        """
+        cached = self._impact_cache.get(term)
+        if cached is None:
+            cached = sorted(
+                (-self._tf_score(tf, doc_id, avgdl), doc_id)
+                for doc_id, tf in self.postings[term].items()
+            )
+            self._impact_cache[term] = cached
+        return cached
+
+    def _tf_score(self, tf: float, doc_id: str, avgdl: float) -> float:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_id] / avgdl)
+        return tf * (BM25_K1 + 1) / (tf + norm)
+
+    def search(
+        self,
+        q: str,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        category: Optional[str] = None,
+        limit: int = 12,
+        offset: int = 0,
+    ) -> list[tuple[str, float]]:
+        """
+        Return `(product_id, score)` pairs ranked by BM25.  Every query token
+        must match (AND semantics); the last token is also treated as a
+        prefix so partially typed words still find results.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+
+        groups = []
+        for i, token in enumerate(tokens):
+            terms = self._expand(token, prefix=(i == len(tokens) - 1))
+            if not terms:
+                return []
+            groups.append(terms)
+
+        avgdl = self.total_len / max(len(self.doc_len), 1) or 1.0
+        if abs(avgdl - self._impact_avgdl) > 0.1 * self._impact_avgdl:
+            self._impact_cache.clear()
+            self._impact_avgdl = avgdl
+        avgdl = self._impact_avgdl  # keep scores consistent with cached impacts
+        idfs = [{t: self._idf(t) for t in terms} for terms in groups]
+
+        lo = -math.inf if min_price is None else min_price
+        hi = math.inf if max_price is None else max_price
+
+        def accept(doc_id: str) -> bool:
+            price, stock, cat = self.doc_meta[doc_id]
+            return (
+                lo <= price <= hi
+                and (in_stock is None or bool(stock) == in_stock)
+                and (not category or cat == category)
+            )
+
+        filters = []
+        if category:
+            filters.append((len(self.by_category.get(category, ())), "category", None))
+        if in_stock is not None:
+            size = len(self.in_stock) if in_stock else len(self) - len(self.in_stock)
+            filters.append((size, "in_stock", None))
+        if min_price is not None or max_price is not None:
+            by_price = self._sorted_prices()
+            start = bisect_left(by_price, (lo, ""))
+            end = bisect_right(by_price, (hi, "\uffff"))
+            filters.append((end - start, "price", (start, end)))
+        if any(size == 0 for size, _, _ in filters):
+            return []
+
+        # Cost model: walking impact-ordered postings stops after roughly
+        # `wanted / selectivity` documents; scanning the narrowest filter list
+        # costs its length.  Take whichever is cheaper.
+        wanted = offset + limit
+        sizes = [sum(len(self.postings[t]) for t in terms) for terms in groups]
+        driver = min(range(len(groups)), key=sizes.__getitem__)
+        selectivity = 1.0
+        for size, _, _ in filters:
+            selectivity *= size / len(self)
+        walk_cost = min(sizes[driver], wanted / selectivity)
+        narrowest = min(filters, default=None)
+
+        if narrowest is None or narrowest[0] >= walk_cost:
+            top = self._top_by_impact(groups, idfs, driver, avgdl, accept, wanted)
+        else:
+            _, kind, arg = narrowest
+            if kind == "category":
+                ids = self.by_category[category]
+            elif kind == "in_stock":
+                ids = self.in_stock if in_stock else self.doc_len.keys() - self.in_stock
+            else:
+                ids = (doc_id for _, doc_id in by_price[arg[0]:arg[1]])
+            scored = []
+            for doc_id in ids:
+                if accept(doc_id):
+                    score = self._score_groups(doc_id, groups, idfs, avgdl)
+                    if score:
+                        scored.append((score, doc_id))
+            top = heapq.nsmallest(wanted, scored, key=lambda s: (-s[0], s[1]))
+        return [(doc_id, score) for score, doc_id in top[offset:]]
+
+    def _score_groups(self, doc_id, groups, idfs, avgdl) -> float:
+        """
+        Sum of the best-matching term per group; 0.0 if any group misses.
+        """
+        score = 0.0
+        for terms, idf in zip(groups, idfs):
+            best = 0.0
+            for t in terms:
+                tf = self.postings[t].get(doc_id)
+                if tf:
+                    best = max(best, idf[t] * self._tf_score(tf, doc_id, avgdl))
+            if not best:
+                return 0.0
+            score += best
+        return score
+
+    def _top_by_impact(self, groups, idfs, driver, avgdl, accept, wanted) -> list[tuple[float, str]]:
+        # Threshold walk: visit the driver group's postings best-first and stop
+        # once even a perfect match on the remaining groups could not beat the
+        # current k-th score, so common terms cost O(page), not O(df).
+        others = [g for g in range(len(groups)) if g != driver]
+        other_groups = [groups[g] for g in others]
+        other_idfs = [idfs[g] for g in others]
+        ceiling = sum(
+            max(idfs[g][t] * -self._impacts(t, avgdl)[0][0] for t in groups[g])
+            for g in others
+        )
+        streams = [_scaled(self._impacts(t, avgdl), idfs[driver][t]) for t in groups[driver]]
+
+        # Heap entries carry the visit order so ties rank the same way on
+        # every page: (score desc, first visited first).
+        heap: list[tuple[float, int, str]] = []
+        seen = set()
+        for seq, (neg_score, doc_id) in enumerate(heapq.merge(*streams)):
+            if len(heap) == wanted and ceiling - neg_score <= heap[0][0]:
+                break
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if not accept(doc_id):
+                continue
+            rest = self._score_groups(doc_id, other_groups, other_idfs, avgdl) if others else 0.0
+            if others and not rest:
+                continue
+            item = (rest - neg_score, -seq, doc_id)
+            if len(heap) < wanted:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return [(score, doc_id) for score, _, doc_id in sorted(heap, reverse=True)]
+
+
+def _scaled(impacts, factor):
+    for neg_score, doc_id in impacts:
+        yield neg_score * factor, doc_id
+
+
+class CatalogSearch:
+    """
+    Owns the live `ProductSearchIndex`: builds it from MongoDB on first use,
+    applies admin writes to it, and periodically rebuilds it in the background
+    when SEARCH_INDEX_REFRESH_SECONDS is set (useful with several workers,
+    where a write only reaches the index of the worker that handled it).
+    """
+
+    def __init__(self, refresh_seconds: int = SEARCH_INDEX_REFRESH_SECONDS):
+        self.index: Optional[ProductSearchIndex] = None
+        self.built_at = 0.0
+        self.refresh_seconds = refresh_seconds
+        self._lock = asyncio.Lock()
+        self._rebuilding = False
+        self._pending: list[tuple[str, object]] = []
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def _build(self, db) -> ProductSearchIndex:
+        index = ProductSearchIndex()
+        projection = {"name": 1, "description": 1, "category": 1, "price": 1, "in_stock": 1}
+        n = 0
+        async for prod in db.products.find({}, projection):
+            index.add(prod)
+            n += 1
+            if n % 1000 == 0:
+                await asyncio.sleep(0)  # let other requests run during big builds
+        index.warm()
+        return index
+
+    async def _rebuild(self, db):
+        self._rebuilding = True
+        self._pending = []
+        try:
+            index = await self._build(db)
+            for op, arg in self._pending:
+                if op == "add":
+                    index.add(arg)
+                elif op == "remove":
+                    index.remove(arg)
+                else:
+                    index.set_in_stock(*arg)
+            self.index = index
+            self.built_at = time.monotonic()
+        finally:
+            self._rebuilding = False
+            self._pending = []
+
+    async def ensure_ready(self, db) -> ProductSearchIndex:
+        if self.index is None:
+            async with self._lock:
+                if self.index is None:
+                    await self._rebuild(db)
+        elif (
+            self.refresh_seconds
+            and not self._rebuilding
+            and (self._refresh is None or self._refresh.done())
+            and time.monotonic() - self.built_at > self.refresh_seconds
+        ):
+            # Keep a reference so the task isn't garbage collected mid-build.
+            self._refresh = asyncio.create_task(self._rebuild(db))
+            self._refresh.add_done_callback(self._refresh_done)
+        return self.index
+
+    @staticmethod
+    def _refresh_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("search index refresh failed; keeping the old index", exc_info=task.exception())
+
+    def index_product(self, prod: dict):
+        if self._rebuilding:
+            self._pending.append(("add", prod))
+        if self.index is not None:
+            self.index.add(prod)
+
+    def remove_product(self, product_id: str):
+        if self._rebuilding:
+            self._pending.append(("remove", product_id))
+        if self.index is not None:
+            self.index.remove(product_id)
+
+    def set_in_stock(self, product_id: str, in_stock: bool):
+        if self._rebuilding:
+            self._pending.append(("in_stock", (product_id, in_stock)))
+        if self.index is not None:
+            self.index.set_in_stock(product_id, in_stock)
+
+    async def search(self, db, q: str, **filters) -> list[tuple[str, float]]:
+        index = await self.ensure_ready(db)
+        return index.search(q, **filters)
+
+    def reset(self):
+        self.index = None
+        self.built_at = 0.0
+
+
+catalog_search = CatalogSearch()
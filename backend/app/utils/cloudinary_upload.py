@@ -1,6 +1,7 @@
 import cloudinary
 import cloudinary.uploader
 import os
+from starlette.concurrency import run_in_threadpool
 
 # Load env variables
 cloudinary.config(
@@ -10,6 +11,6 @@ cloudinary.config(
 )
 
 async def upload_product_image(file):
-    # You CANNOT await cloudinary.uploader.upload() — it's sync function
-    result = cloudinary.uploader.upload(file.file)
+    # cloudinary.uploader.upload() is a blocking HTTP call: run it in a thread
+    result = await run_in_threadpool(cloudinary.uploader.upload, file.file)
     return result["secure_url"]
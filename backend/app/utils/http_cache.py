@@ -0,0 +1,74 @@
+# app/utils/http_cache.py
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong validator: a hash of the exact response bytes.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def http_date(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # stored datetimes are naive UTC
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison, as If-None-Match requires (a compressed representation
+    carries the weakened form of the same tag).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    ours = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == ours for tag in if_none_match.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified.replace(microsecond=0)
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        return modified <= since
+    return False
+
+
+def conditional_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str,
+    last_modified: Optional[datetime] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    JSON response for already-encoded `body` with validators attached, or
+    an empty 304 when the client's copy is still current.
+    """
+    validators = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        validators["Last-Modified"] = http_date(last_modified)
+    if headers:
+        validators.update(headers)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=validators)
+    return Response(body, media_type="application/json", headers=validators)
@@ -0,0 +1,117 @@
+# app/utils/idempotency.py
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.config import IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+from app.indexes import INDEXES
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Collections (full names) whose unique (user_email, key) index is known to exist.
+_indexed: set[str] = set()
+_index_lock = asyncio.Lock()
+
+
+async def ensure_key_index(collection):
+    """
+    Duplicate detection relies entirely on the unique (user_email, key)
+    index, so make sure it exists before the first claim instead of trusting
+    the startup hook (which tolerates MongoDB being down, and doesn't run
+    under ASGITransport).  Fails closed: without the index, 503 rather than
+    risk placing the same order twice.
+    """
+    if collection.full_name in _indexed:
+        return
+    async with _index_lock:
+        if collection.full_name in _indexed:
+            return
+        try:
+            await collection.create_indexes(INDEXES["idempotency_keys"])
+        except PyMongoError:
+            raise HTTPException(
+                status_code=503,
+                detail="Idempotency-Key handling is unavailable, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _indexed.add(collection.full_name)
+
+
+async def _take_over_stale(collection, user_email: str, key: str) -> bool:
+    """
+    Claim a record whose owner never finished (e.g. the worker died).
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    taken = await collection.find_one_and_update(
+        {"user_email": user_email, "key": key, "status": "in_progress", "locked_at": {"$lt": stale_before}},
+        {"$set": {"locked_at": datetime.utcnow()}},
+        projection={"_id": 1},
+    )
+    return taken is not None
+
+
+async def claim_key(collection, user_email: str, key: str) -> Optional[Any]:
+    """
+    Claim `key` for this user.  Returns None when the caller now owns it and
+    should do the work, or the stored response body when the request was
+    already completed.  A duplicate that arrives while the original is
+    still running waits for it; 409 if it doesn't finish in time.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+    await ensure_key_index(collection)
+
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        now = datetime.utcnow()
+        try:
+            await collection.insert_one({
+                "user_email": user_email,
+                "key": key,
+                "status": "in_progress",
+                "created_at": now,
+                "locked_at": now,
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        record = await collection.find_one(
+            {"user_email": user_email, "key": key},
+            {"status": 1, "response": 1},
+        )
+        if record is None:
+            continue  # the original failed and released the key; try again
+        if record["status"] == "completed":
+            return record["response"]
+        if await _take_over_stale(collection, user_email, key):
+            return None
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+async def complete_key(collection, user_email: str, key: str, response: Any):
+    await collection.update_one(
+        {"user_email": user_email, "key": key},
+        {"$set": {"status": "completed", "response": response}, "$unset": {"locked_at": ""}},
+    )
+
+
+async def release_key(collection, user_email: str, key: str):
+    """
+    Forget a claim whose request failed so a retry can run it again.
+    """
+    await collection.delete_one({"user_email": user_email, "key": key, "status": "in_progress"})
@@ -0,0 +1,111 @@
+# app/utils/pagination.py
+
+import base64
+import binascii
+from typing import Optional
+
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Stable sort orders usable for keyset pagination.  `_id` is always the last
+# key so ties are broken deterministically; each order has a matching
+# compound index in app/indexes.py.
+PRODUCT_SORTS = {
+    "created_at": [("created_at", 1), ("_id", 1)],
+    "-created_at": [("created_at", -1), ("_id", -1)],
+    "price": [("price", 1), ("_id", 1)],
+    "-price": [("price", -1), ("_id", -1)],
+}
+
+# A user's order history, newest first.
+ORDER_SORTS = {
+    "-created_at": [("created_at", -1), ("_id", -1)],
+}
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json_util.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> dict:
+    """
+    Decode an opaque cursor, rejecting ones that are malformed or that were
+    issued for a different sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(data, dict) or data.get("s") != sort:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return data
+
+
+def keyset_filter(sort_spec: list[tuple[str, int]], last: list) -> dict:
+    """
+    Build the "strictly after `last`" filter for a (field, _id) sort, e.g.
+    `{"$or": [{"price": {"$gt": p}}, {"price": p, "_id": {"$gt": id}}]}`.
+
+    MongoDB sorts null/missing values before everything else, and range
+    operators never match them, so nulls get their own branches: after a
+    null on an ascending sort come the remaining nulls and then every
+    non-null value; on a descending sort the nulls come last.
+    """
+    (field, direction), (_, id_direction) = sort_spec
+    value, last_id = last
+    op = "$gt" if direction == 1 else "$lt"
+    id_op = "$gt" if id_direction == 1 else "$lt"
+    ties = {field: value, "_id": {id_op: ObjectId(last_id)}}
+    if value is None:
+        return {"$or": [ties, {field: {"$ne": None}}]} if direction == 1 else ties
+    branches = [{field: {op: value}}, ties]
+    if direction == -1:
+        branches.append({field: None})
+    return {"$or": branches}
+
+
+def paginate_query(query: dict, sort: str, cursor: Optional[str], sorts: dict = PRODUCT_SORTS) -> dict:
+    """
+    Combine a route's filter with the keyset condition from `cursor`.
+    """
+    if not cursor:
+        return query
+    data = decode_cursor(cursor, sort)
+    try:
+        after = keyset_filter(sorts[sort], data["v"])
+    except (KeyError, ValueError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$and": [query, after]} if query else after
+
+
+def decode_offset_cursor(cursor: str, sort: str = "relevance") -> int:
+    """
+    Offset cursors are used for result lists that are ranked in memory
+    (search relevance), where skipping costs nothing in MongoDB.
+    """
+    offset = decode_cursor(cursor, sort).get("o")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def next_cursor_for(docs: list[dict], sort: str, limit: int, sorts: dict = PRODUCT_SORTS) -> Optional[str]:
+    """
+    Cursor pointing after the last raw document of a full page, else None.
+    """
+    if len(docs) < limit:
+        return None
+    field = sorts[sort][0][0]
+    last = docs[-1]
+    last_id = last["_id"] if "_id" in last else last["id"]  # raw or shaped document
+    return encode_cursor({"s": sort, "v": [last.get(field), str(last_id)]})
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,34 @@
+# app/utils/raw_bson.py
+
+from typing import Optional
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+
+
+async def find_shaped(
+    collection,
+    query: dict,
+    projection: dict,
+    sort: Optional[list] = None,
+    skip: int = 0,
+    limit: int = 0,
+) -> list[dict]:
+    """
+    Run a find whose `projection` already produces the response shape
+    (e.g. PRODUCT_PROJECTION).  Documents arrive as RawBSONDocument, i.e.
+    the undecoded bytes off the wire, and the whole batch is decoded with
+    a single `decode_all` call straight into the dicts we serialize.
+    """
+    cursor = collection.with_options(codec_options=RAW_CODEC).find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    if skip:
+        cursor = cursor.skip(skip)
+    if limit:
+        cursor = cursor.limit(limit)
+    docs = await cursor.to_list(length=limit or None)
+    return bson.decode_all(b"".join(doc.raw for doc in docs))
@@ -0,0 +1,92 @@
+# app/utils/responses.py
+
+import functools
+import inspect
+from typing import Any, Callable
+
+import orjson
+from bson import ObjectId
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.config import SKIP_RESPONSE_VALIDATION
+
+
+def _default(obj: Any):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if hasattr(obj, "model_dump"):  # pydantic models returned as-is
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    App-wide default response class: orjson instead of stdlib json, with
+    ObjectId support.  Naive datetimes come out as ISO 8601 without an
+    offset, same as pydantic's encoding.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_response(endpoint: Callable) -> Callable:
+    """
+    Mark a handler whose return value is already exactly its
+    response_model's shape (built by product_helper / user_helper), so
+    `FastJSONRoute` may skip re-validating it.
+    """
+    endpoint.__trusted_response__ = True
+    return endpoint
+
+
+def _encode_directly(endpoint: Callable, status_code: int) -> Callable:
+    """
+    Wrap `endpoint` so its result is encoded straight into a
+    FastJSONResponse.  FastAPI passes a returned Response through untouched,
+    so response_model validation/serialization is skipped while the model
+    still documents the route.  Headers/status set on the injected
+    `response` parameter (e.g. X-Next-Cursor) are carried over.
+    """
+    sig = inspect.signature(endpoint)
+    has_response = "response" in sig.parameters
+    if not has_response:
+        extra = inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response)
+        sig = sig.replace(parameters=[*sig.parameters.values(), extra])
+    is_async = inspect.iscoroutinefunction(endpoint)
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        response = kwargs["response"] if has_response else kwargs.pop("response")
+        if is_async:
+            content = await endpoint(*args, **kwargs)
+        else:
+            content = await run_in_threadpool(endpoint, *args, **kwargs)
+        if isinstance(content, Response):
+            return content
+        fast = FastJSONResponse(content, status_code=response.status_code or status_code)
+        fast.headers.raw.extend(response.headers.raw)
+        return fast
+
+    wrapper.__signature__ = sig
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route class for every router.  With SKIP_RESPONSE_VALIDATION on,
+    handlers marked with @trusted_response bypass response_model
+    re-validation; everything else behaves exactly like APIRoute.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if SKIP_RESPONSE_VALIDATION and getattr(endpoint, "__trusted_response__", False):
+            endpoint = _encode_directly(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,25 @@
+# app/utils/uploads.py
+
+import os
+import shutil
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+
+def _write(src, directory: str, path: str):
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(src, buffer)
+
+
+async def save_upload(file: UploadFile, directory: str) -> str:
+    """
+    Save an uploaded file as `directory/<filename>` and return its path.
+    Large uploads are spooled to disk by Starlette, so copying one (and
+    creating the directory) is blocking file I/O: it runs in a worker
+    thread, off the event loop.
+    """
+    path = os.path.join(directory, file.filename)
+    await run_in_threadpool(_write, file.file, directory, path)
+    return path
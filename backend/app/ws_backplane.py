@@ -0,0 +1,222 @@
+# app/ws_backplane.py
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+
+from app.config import (
+    REDIS_URL,
+    WS_BACKPLANE,
+    WS_BACKPLANE_CHANNEL,
+    WS_BATCH_MAX,
+    WS_BATCH_WINDOW_MS,
+)
+from app.ws_manager import manager
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, dict], Awaitable[int]]
+
+
+class MemoryBroker:
+    """
+    In-process stand-in for Redis pub/sub: every subscriber receives every
+    payload.  Enough for a single worker and for tests.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self.subscribers: list[Callable[[str], Awaitable[None]]] = []
+
+    async def publish(self, payload: str):
+        for callback in tuple(self.subscribers):
+            await callback(payload)
+
+    async def subscribe(self, callback: Callable[[str], Awaitable[None]]):
+        self.subscribers.append(callback)
+
+    async def close(self):
+        self.subscribers.clear()
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self.subscribers)}
+
+
+class RedisBroker:
+    """
+    One Redis channel shared by every worker.  Each worker (including the
+    publisher) receives each payload once and delivers to its own sockets.
+
+    If the subscription drops, the reader resubscribes with exponential
+    backoff; publishes fail meanwhile and the backplane delivers locally.
+    """
+
+    name = "redis"
+    RECONNECT_MIN = 0.5   # seconds
+    RECONNECT_MAX = 30.0
+
+    def __init__(self, url: str, channel: str):
+        import redis.asyncio as redis  # optional: only needed for this backend
+
+        self.redis = redis.from_url(url)
+        self.channel = channel
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+        self.connected = False
+        self.reconnects = 0
+        self.failures = 0
+
+    async def publish(self, payload: str):
+        await self.redis.publish(self.channel, payload)
+
+    async def subscribe(self, callback: Callable[[str], Awaitable[None]]):
+        await self._connect()
+        self.reader = asyncio.create_task(self._read(callback))
+
+    async def _connect(self):
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.channel)
+        self.connected = True
+
+    async def _disconnect(self):
+        self.connected = False
+        if self.pubsub is not None:
+            try:
+                await self.pubsub.aclose()
+            except Exception:
+                pass
+            self.pubsub = None
+
+    async def _read(self, callback):
+        delay = self.RECONNECT_MIN
+        while True:
+            try:
+                if self.pubsub is None:
+                    await self._connect()
+                    self.reconnects += 1
+                    logger.info("websocket backplane resubscribed to %s", self.channel)
+                    delay = self.RECONNECT_MIN
+                async for message in self.pubsub.listen():
+                    try:
+                        await callback(message["data"])
+                    except Exception:
+                        logger.exception("websocket backplane message failed")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.warning("websocket backplane subscription lost; retrying in %.1f s", delay, exc_info=True)
+            await self._disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX)
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        await self._disconnect()
+        await self.redis.aclose()
+
+    def stats(self) -> dict:
+        return {"connected": self.connected, "reconnects": self.reconnects, "failures": self.failures}
+
+
+class Backplane:
+    """
+    Publishes WebSocket pushes to every worker.  Events are batched: the
+    first publish opens a short window and everything published in it (up
+    to `batch_max`) goes out as one broker message.
+
+    Until `start()` has run (e.g. under a test client without lifespan) or
+    if the broker fails, events are delivered to local sockets directly.
+    """
+
+    def __init__(self, broker, deliver: Deliver, batch_window_ms: int = WS_BATCH_WINDOW_MS, batch_max: int = WS_BATCH_MAX):
+        self.broker = broker
+        self.deliver = deliver
+        self.batch_window = batch_window_ms / 1000
+        self.batch_max = batch_max
+        self.running = False
+        self._pending: list[tuple[str, dict]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self.published_events = 0
+        self.published_batches = 0
+        self.received_batches = 0
+        self.delivered = 0
+        self.undelivered = 0
+        self.errors = 0
+
+    async def start(self):
+        await self.broker.subscribe(self._receive)
+        self.running = True
+
+    async def stop(self):
+        await self.flush()
+        self.running = False
+        await self.broker.close()
+
+    # ─── PUBLISH ────────────────────────────────────────────────────────────
+    async def publish(self, email: str, message: dict):
+        if not self.running:
+            await self._deliver(email, message)
+            return
+        self._pending.append((email, message))
+        self.published_events += 1
+        if len(self._pending) >= self.batch_max:
+            await self.flush()
+        elif self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        self._flusher = None
+        await self.flush()
+
+    async def flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.published_batches += 1
+        try:
+            await self.broker.publish(json.dumps({"events": batch}, default=str))
+        except Exception:
+            self.errors += 1
+            logger.warning("websocket backplane publish failed; delivering locally", exc_info=True)
+            for email, message in batch:
+                await self._deliver(email, message)
+
+    # ─── RECEIVE ────────────────────────────────────────────────────────────
+    async def _receive(self, payload):
+        self.received_batches += 1
+        for email, message in json.loads(payload)["events"]:
+            await self._deliver(email, message)
+
+    async def _deliver(self, email: str, message: dict):
+        if await self.deliver(email, message):
+            self.delivered += 1
+        else:
+            self.undelivered += 1  # no socket for this user on this worker
+
+    def stats(self) -> dict:
+        return {
+            "broker": self.broker.name,
+            "running": self.running,
+            "pending": len(self._pending),
+            "published_events": self.published_events,
+            "published_batches": self.published_batches,
+            "received_batches": self.received_batches,
+            "delivered": self.delivered,
+            "undelivered": self.undelivered,
+            "errors": self.errors,
+            **self.broker.stats(),
+        }
+
+
+def build_broker(kind: str):
+    if kind == "redis":
+        return RedisBroker(REDIS_URL, WS_BACKPLANE_CHANNEL)
+    return MemoryBroker()
+
+
+backplane = Backplane(build_broker(WS_BACKPLANE), manager.push_update)
@@ -1,50 +1,267 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from jose import JWTError, jwt
+# app/ws_manager.py
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import WebSocket
+from app.auth.dependencies import principal_cache, token_subject
+from app.config import (
+    WS_COALESCE_MS,
+    WS_IDLE_TIMEOUT_SECONDS,
+    WS_MAX_QUEUE,
+    WS_PING_INTERVAL_SECONDS,
+    WS_SEND_TIMEOUT_SECONDS,
+    WS_SLOW_CONSUMER,
+)
 from app.database import db
-from app.schemas.user_schema import UserResponse
-from app.models.user_model import user_helper
-import os
 
-SECRET_KEY = os.getenv("JWT_SECRET", "supersecret")  # same as in your HTTP token generation
-ALGORITHM = "HS256"
+logger = logging.getLogger(__name__)
+
+# Close codes: 1001 idle (no pong), 1008 policy violation (fell too far
+# behind), 1011 send failed.
+CLOSE_IDLE = 1001
+CLOSE_SLOW_CONSUMER = 1008
+CLOSE_SEND_FAILED = 1011
+
+
+class Connection:
+    """
+    One accepted socket with its bounded outbound queue.  A dedicated writer
+    task drains the queue, so a slow client only ever delays itself.
+    """
+
+    def __init__(self, websocket: WebSocket, email: str, max_queue: int):
+        self.websocket = websocket
+        self.email = email
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.last_seen = time.monotonic()
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
+    """
+    Registry of open sockets, any number per user.  Registering and
+    unregistering are O(1) set operations; `push_update` only enqueues, it
+    never waits on a socket.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = WS_MAX_QUEUE,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        slow_consumer: str = WS_SLOW_CONSUMER,
+        ping_interval: float = WS_PING_INTERVAL_SECONDS,
+        idle_timeout: float = WS_IDLE_TIMEOUT_SECONDS,
+        coalesce_ms: int = WS_COALESCE_MS,
+    ):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.slow_consumer = slow_consumer
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.coalesce_window = coalesce_ms / 1000
+        self.active_connections: dict[str, set[Connection]] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        # (email, order_id) -> latest order_update waiting for the window
+        self._coalescing: dict[tuple[str, str], dict] = {}
+        self._coalesce_flush: Optional[asyncio.Task] = None
+        # Pending closes, referenced until done so none is collected mid-way.
+        self._closing: set[asyncio.Task] = set()
+        self.sent = 0
+        self.dropped = 0
+        self.send_failures = 0
+        self.slow_disconnects = 0
+        self.coalesced = 0
+        self.pings = 0
+        self.reaped = 0
 
-    async def connect(self, websocket: WebSocket):
+    # ─── REGISTRY ───────────────────────────────────────────────────────────
+    async def connect(self, websocket: WebSocket) -> Optional[Connection]:
+        """
+        Accept and authenticate a socket (`?token=<access token>`).
+        Returns its Connection, or None after closing it.
+        """
         await websocket.accept()
 
         token = websocket.query_params.get("token")
         if not token:
             await websocket.close(code=4001)
+            return None
+
+        email = token_subject(token)
+        if not email:
+            await websocket.close(code=4004)
+            return None
+
+        if principal_cache.get(email) is None and not await db.users.find_one({"email": email}, {"_id": 1}):
+            await websocket.close(code=4003)
+            return None
+
+        return self.register(websocket, email)
+
+    def register(self, websocket: WebSocket, email: str) -> Connection:
+        conn = Connection(websocket, email, self.max_queue)
+        conn.writer = asyncio.create_task(self._write(conn))
+        self.active_connections.setdefault(email, set()).add(conn)
+        if not self._alive(self._heartbeat) and self.ping_interval > 0:
+            self._heartbeat = self._background("_heartbeat", self._heartbeat_loop())
+        return conn
+
+    def touch(self, conn: Connection):
+        """
+        Record inbound traffic (a pong or any other message) from `conn`.
+        """
+        conn.last_seen = time.monotonic()
+
+    def disconnect(self, conn: Connection):
+        if conn.closed:
             return
+        conn.closed = True
+        sockets = self.active_connections.get(conn.email)
+        if sockets is not None:
+            sockets.discard(conn)
+            if not sockets:
+                del self.active_connections[conn.email]
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
 
+    # ─── TASKS ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _alive(task: Optional[asyncio.Task]) -> bool:
+        """
+        A task that is still running on the current loop (one left over
+        from a closed loop never finishes, so it doesn't count).
+        """
+        return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+    def _background(self, attr: str, coro) -> asyncio.Task:
+        """
+        Start the heartbeat / coalesce-flush task stored in `attr`.  When it
+        ends, the attribute is cleared (so the next caller starts a new
+        one) and a crash is logged.
+        """
+        task = asyncio.create_task(coro)
+
+        def done(t: asyncio.Task):
+            if getattr(self, attr) is t:
+                setattr(self, attr, None)
+            if not t.cancelled() and t.exception() is not None:
+                logger.error("websocket %s task failed", attr.lstrip("_"), exc_info=t.exception())
+
+        task.add_done_callback(done)
+        return task
+
+    def _schedule_close(self, conn: Connection, code: int):
+        task = asyncio.create_task(self._close(conn, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, conn: Connection, code: int):
+        self.disconnect(conn)
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            email: str = payload.get("sub")
-            if not email:
-                await websocket.close(code=4002)
-                return
+            await conn.websocket.close(code=code)
+        except Exception:
+            pass  # already gone
+
+    async def stop(self):
+        for task in (self._heartbeat, self._coalesce_flush):
+            if task is not None:
+                task.cancel()
+        self._heartbeat = self._coalesce_flush = None
+        for sockets in tuple(self.active_connections.values()):
+            for conn in tuple(sockets):
+                await self._close(conn, CLOSE_IDLE)
+
+    # ─── HEARTBEAT ──────────────────────────────────────────────────────────
+    async def _heartbeat_loop(self):
+        """
+        One task for every socket: ping the live ones, reap the ones that
+        have been silent for longer than the idle timeout (dead peers
+        whose TCP connection the OS hasn't noticed yet).
+        """
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            stale_before = time.monotonic() - self.idle_timeout
+            for sockets in tuple(self.active_connections.values()):
+                for conn in tuple(sockets):
+                    if conn.last_seen < stale_before:
+                        self.reaped += 1
+                        self._schedule_close(conn, CLOSE_IDLE)
+                    elif self._offer(conn, {"type": "ping"}):
+                        self.pings += 1
 
-            user_doc = await db.users.find_one({"email": email})
-            if not user_doc:
-                await websocket.close(code=4003)
+    # ─── DELIVERY ───────────────────────────────────────────────────────────
+    async def _write(self, conn: Connection):
+        while True:
+            message = await conn.queue.get()
+            try:
+                await asyncio.wait_for(conn.websocket.send_json(message), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.send_failures += 1
+                logger.info("websocket send to %s failed; closing", conn.email)
+                await self._close(conn, CLOSE_SEND_FAILED)
                 return
+            self.sent += 1
 
-            self.active_connections[email] = websocket
+    def _offer(self, conn: Connection, message: dict) -> bool:
+        try:
+            conn.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.slow_consumer == "disconnect":
+                self.slow_disconnects += 1
+                self._schedule_close(conn, CLOSE_SLOW_CONSUMER)
+            return False
 
-        except JWTError:
-            await websocket.close(code=4004)
-            return
+    def _fan_out(self, email: str, message: dict) -> int:
+        return sum(self._offer(conn, message) for conn in tuple(self.active_connections.get(email, ())))
+
+    async def push_update(self, email: str, message: dict) -> int:
+        """
+        Queue `message` for this process's sockets of `email`; returns how
+        many will get it.  Other workers are reached via app.ws_backplane.
+
+        order_update events are held for the coalescing window; a later
+        update for the same order replaces the earlier one, so a burst of
+        status changes reaches the client as one frame.
+        """
+        if self.coalesce_window <= 0 or message.get("type") != "order_update":
+            return self._fan_out(email, message)
+
+        key = (email, message.get("order_id"))
+        if key in self._coalescing:
+            self.coalesced += 1
+        self._coalescing[key] = message
+        if not self._alive(self._coalesce_flush):
+            self._coalesce_flush = self._background("_coalesce_flush", self._flush_coalesced())
+        return len(self.active_connections.get(email, ()))
+
+    async def _flush_coalesced(self):
+        await asyncio.sleep(self.coalesce_window)
+        self._coalesce_flush = None
+        pending, self._coalescing = self._coalescing, {}
+        for (email, _), message in pending.items():
+            self._fan_out(email, message)
 
-    def disconnect(self, email: str):
-        if email in self.active_connections:
-            del self.active_connections[email]
+    def stats(self) -> dict:
+        return {
+            "users": len(self.active_connections),
+            "connections": sum(len(s) for s in self.active_connections.values()),
+            "queued": sum(c.queue.qsize() for s in self.active_connections.values() for c in s),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "pings": self.pings,
+            "reaped": self.reaped,
+            "send_failures": self.send_failures,
+            "slow_disconnects": self.slow_disconnects,
+        }
 
-    async def push_update(self, email: str, message: dict):
-        websocket = self.active_connections.get(email)
-        if websocket:
-            await websocket.send_json(message)
 
 manager = ConnectionManager()
@@ -0,0 +1,78 @@
+"""
+Checkout pricing benchmark: one `find_one` per cart line (the old
+place_order loop) vs. the single `$in` query in `price_cart`.
+
+Needs a MongoDB at MONGO_URL; uses a scratch database that is dropped
+afterwards.  Round-trip latency dominates the old path, so run it against
+a server with realistic network distance to see the full effect.
+
+Usage (from backend/):
+    python -m benchmarks.bench_checkout --sizes 1 5 10 25 50 --repeat 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from bson import ObjectId
+
+from app.config import MONGO_URL
+from app.routes.order_routes import price_cart
+
+BENCH_DB = "mini_amazon_bench_checkout"
+
+
+async def price_cart_per_item(products, cart_items):
+    # The pre-batching implementation, kept here as the baseline.
+    order_items, total_price = [], 0.0
+    for ci in cart_items:
+        prod = await products.find_one({"_id": ObjectId(ci["product_id"])})
+        if not prod:
+            raise HTTPException(status_code=404, detail=f"Product {ci['product_id']} not found")
+        order_items.append({"product_id": ci["product_id"], "quantity": ci["quantity"], "price_at_purchase": prod["price"]})
+        total_price += prod["price"] * ci["quantity"]
+    return order_items, total_price
+
+
+async def timed(fn, products, items, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(products, items)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def main(sizes, repeat):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[BENCH_DB]
+    try:
+        await db.products.drop()
+        result = await db.products.insert_many([
+            {"name": f"Bench {i}", "price": float(i % 100) + 0.99, "in_stock": True, "created_at": datetime.utcnow()}
+            for i in range(max(sizes))
+        ])
+        ids = [str(oid) for oid in result.inserted_ids]
+
+        print(f"{'cart size':>9}  {'per-item p50':>12}  {'per-item p95':>12}  {'$in p50':>9}  {'$in p95':>9}  speedup")
+        for size in sizes:
+            items = [{"product_id": pid, "quantity": 1} for pid in ids[:size]]
+            old = await timed(price_cart_per_item, db.products, items, repeat)
+            new = await timed(price_cart, db.products, items, repeat)
+            print(f"{size:>9}  {old[0]:>10.2f}ms  {old[1]:>10.2f}ms  {new[0]:>7.2f}ms  {new[1]:>7.2f}ms  {old[0] / new[0]:>6.1f}x")
+    finally:
+        await client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
@@ -0,0 +1,88 @@
+"""
+Per-request overhead of MetricsMiddleware, and /metrics render time.
+
+Calls a trivial route straight through ASGI (no HTTP client in between, so
+the difference isn't lost in noise) with and without the middleware, in
+alternating rounds, and reports the median per-request difference.  Exits
+1 when it exceeds --budget-us.
+
+Usage (from backend/):
+    python -m benchmarks.bench_metrics --requests 20000 --budget-us 25
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from fastapi import FastAPI
+
+from app.metrics import MetricsMiddleware, MetricsRegistry
+
+
+def build_app(registry=None) -> FastAPI:
+    app = FastAPI()
+    if registry is not None:
+        app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/products/{product_id}")
+    async def product(product_id: str):
+        return {"id": product_id}
+
+    return app
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def per_request_us(app, requests: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        await call(app, f"/products/{i % 100}")
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int, rounds: int, budget_us: float) -> int:
+    registry = MetricsRegistry()
+    plain, instrumented = build_app(), build_app(registry)
+    await per_request_us(plain, 1000)  # warm-up
+    await per_request_us(instrumented, 1000)
+
+    overheads = []
+    for _ in range(rounds):
+        base = await per_request_us(plain, requests)
+        with_metrics = await per_request_us(instrumented, requests)
+        overheads.append(with_metrics - base)
+        print(f"plain {base:8.2f} us/req   with metrics {with_metrics:8.2f} us/req   overhead {with_metrics - base:6.2f} us")
+
+    start = time.perf_counter()
+    text = registry.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    overhead = statistics.median(overheads)
+    print(f"median overhead {overhead:.2f} us/request (budget {budget_us} us)")
+    print(f"/metrics render {render_ms:.2f} ms for {text.count(chr(10))} lines")
+    return 0 if overhead <= budget_us else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=25.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.requests, args.rounds, args.budget_us)))
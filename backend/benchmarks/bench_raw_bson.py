@@ -0,0 +1,98 @@
+"""
+Memory/allocation benchmark for list-endpoint reads, per 1,000 documents.
+
+  dict path:  wire BSON -> dicts (pymongo) -> product_helper copies ->
+              ProductResponse validation -> JSON-mode dump -> json.dumps
+  raw path:   wire BSON (already response-shaped by PRODUCT_PROJECTION on
+              the server) -> RawBSONDocument -> one decode_all -> orjson
+
+The wire batches are built locally so no MongoDB is needed; the raw path's
+input is what the server returns for PRODUCT_PROJECTION.  Reports the
+tracemalloc peak (every intermediate copy alive at once) and wall time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_raw_bson --docs 1000 --repeat 20
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+import bson
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.models.product_model import product_helper
+from app.schemas.product_schema import ProductResponse
+from app.utils.raw_bson import RAW_CODEC
+from app.utils.responses import dumps
+
+PRODUCTS = TypeAdapter(List[ProductResponse])
+
+
+def make_docs(n: int) -> list[dict]:
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Product {i}",
+            "description": "A reasonably descriptive sentence about the product. " * 3,
+            "price": 10.0 + i,
+            "in_stock": i % 7 != 0,
+            "stock": i,
+            "category": ("Books", "Electronics", "Kitchen")[i % 3],
+            "image": f"/uploads/products/{i}.jpg",
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def dict_path(wire: bytes) -> bytes:
+    docs = bson.decode_all(wire)
+    shaped = [product_helper(d) for d in docs]
+    models = PRODUCTS.validate_python(shaped)
+    return json.dumps(PRODUCTS.dump_python(models, mode="json")).encode()
+
+
+def raw_path(wire: bytes) -> bytes:
+    docs = bson.decode_all(wire, RAW_CODEC)  # what the driver hands back
+    return dumps(bson.decode_all(b"".join(d.raw for d in docs)))
+
+
+def measure(fn, wire: bytes, repeat: int) -> tuple[int, float]:
+    fn(wire)  # warm-up (imports, schema caches)
+    tracemalloc.start()
+    fn(wire)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(wire)
+    elapsed = (time.perf_counter() - start) / repeat
+    return peak, elapsed * 1000
+
+
+def main(n: int, repeat: int):
+    docs = make_docs(n)
+    full_wire = b"".join(bson.encode(d) for d in docs)
+    shaped_wire = b"".join(bson.encode(product_helper(d)) for d in docs)
+
+    scale = 1000 / n
+    print(f"per 1,000 documents ({n} measured)")
+    print(f"{'path':<6} {'peak KiB':>10} {'ms':>8}")
+    for name, fn, wire in (("dict", dict_path, full_wire), ("raw", raw_path, shaped_wire)):
+        peak, ms = measure(fn, wire, repeat)
+        print(f"{name:<6} {peak * scale / 1024:>10.0f} {ms * scale:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.docs, args.repeat)
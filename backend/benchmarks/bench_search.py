@@ -0,0 +1,128 @@
+"""
+Product search benchmark: inverted index vs. the old `$regex` scan.
+
+The regex path is modelled in-process as a case-insensitive `re.search` over
+every product name, i.e. the per-document work MongoDB does during the
+COLLSCAN that `{"name": {"$regex": q, "$options": "i"}}` forces.  It is a
+lower bound for the real query (no BSON decoding, no network), so the
+speedups reported here are conservative.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search --sizes 10000 100000 1000000
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from bson import ObjectId
+
+from app.search_index import ProductSearchIndex
+
+WORDS = (
+    "apple samsung sony lenovo dell phone laptop tablet charger cable case "
+    "wireless bluetooth speaker headphones monitor keyboard mouse camera lens "
+    "black white silver blue red pro max mini ultra lite smart watch band "
+    "kitchen mug kettle blender chair desk lamp shelf book novel guide"
+).split()
+SYLLABLES = "ka lo mi ne ra tu vo ze xi ba do fu gi ha ju".split()
+CATEGORIES = ["Electronics", "Home", "Kitchen", "Books", "Fashion", "Toys"]
+QUERIES = ["phone", "wireless speaker", "laptop pro", "blu", "kitchen kettle", "zzz"]
+
+
+def make_vocabulary(rnd: random.Random, size: int = 5000) -> tuple[list[str], list[float]]:
+    # Common product words first, then a long tail of brand/model-like
+    # tokens; Zipf weights so a few terms are very frequent, most are rare.
+    tail = {"".join(rnd.choices(SYLLABLES, k=3)) for _ in range(size * 2)}
+    vocab = WORDS + sorted(tail)[:size]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    return vocab, weights
+
+
+def make_products(n: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    vocab, weights = make_vocabulary(rnd)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": " ".join(rnd.choices(vocab, weights, k=rnd.randint(2, 5))) + f" {i}",
+            "description": " ".join(rnd.choices(vocab, weights, k=rnd.randint(5, 15))),
+            "category": rnd.choice(CATEGORIES),
+            "price": round(rnd.uniform(1, 2000), 2),
+            "in_stock": rnd.random() > 0.2,
+        }
+        for i in range(n)
+    ]
+
+
+def regex_search(products: list[dict], q: str, limit: int = 12) -> list[dict]:
+    pattern = re.compile(q, re.IGNORECASE)
+    out = []
+    for p in products:
+        if pattern.search(p["name"]):
+            out.append(p)
+            if len(out) == limit:
+                break
+    return out
+
+
+def regex_count_scan(products: list[dict], q: str) -> int:
+    # Worst case for the old path: nothing (or little) matches, so the whole
+    # collection is scanned before the page fills up.
+    pattern = re.compile(q, re.IGNORECASE)
+    return sum(1 for p in products if pattern.search(p["name"]))
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {label:<28} p50={p50:9.3f} ms  p99={p99:9.3f} ms")
+
+
+def run(size: int, repeat: int):
+    products = make_products(size)
+
+    start = time.perf_counter()
+    index = ProductSearchIndex()
+    for p in products:
+        index.add(p)
+    index.warm()
+    build = time.perf_counter() - start
+    print(f"\n{size:,} products (index build {build:.2f}s)")
+
+    for q in QUERIES:
+        print(f" q={q!r}")
+        # First query for a term sorts its impact list; reported separately.
+        report("index (cold)", timed(lambda: index.search(q), 1))
+        report("regex scan (first page)", timed(lambda: regex_search(products, q), repeat))
+        report("regex scan (full)", timed(lambda: regex_count_scan(products, q), repeat))
+        report("index", timed(lambda: index.search(q), repeat))
+        report("index + filters", timed(
+            lambda: index.search(q, min_price=100, max_price=500, in_stock=True, category="Electronics"),
+            repeat,
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Response serialization benchmark for list endpoints: stdlib JSONResponse
+with response_model validation (FastAPI's default) vs. FastJSONResponse
+(orjson) with validation vs. orjson with @trusted_response skipping it.
+
+Serves pages of product_helper-shaped documents from memory through the
+full ASGI stack (httpx ASGITransport), so the numbers isolate routing +
+validation + encoding from MongoDB.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --sizes 12 100 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from fastapi import APIRouter, FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from httpx import ASGITransport, AsyncClient
+
+import app.utils.responses as responses
+from app.models.product_model import product_helper
+from app.schemas.product_schema import ProductResponse
+from app.utils.responses import FastJSONResponse, FastJSONRoute, trusted_response
+
+
+def make_page(size: int) -> list[dict]:
+    start = datetime(2025, 1, 1)
+    return [
+        product_helper({
+            "_id": ObjectId(),
+            "name": f"Product {i}",
+            "description": "A reasonably descriptive sentence about the product. " * 3,
+            "price": 10.0 + i,
+            "in_stock": i % 7 != 0,
+            "stock": i,
+            "category": ("Books", "Electronics", "Kitchen")[i % 3],
+            "image": f"/uploads/products/{i}.jpg",
+            "created_at": start + timedelta(minutes=i),
+        })
+        for i in range(size)
+    ]
+
+
+def build_app(variant: str, page: list[dict]) -> FastAPI:
+    responses.SKIP_RESPONSE_VALIDATION = variant == "orjson+skip"
+    route_class = APIRoute if variant == "stdlib" else FastJSONRoute
+    response_class = JSONResponse if variant == "stdlib" else FastJSONResponse
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/products", response_model=List[ProductResponse])
+    @trusted_response
+    async def products(response: Response):
+        response.headers["X-Next-Cursor"] = "c"
+        return page
+
+    app = FastAPI(default_response_class=response_class)
+    app.include_router(router)
+    return app
+
+
+async def run(variant: str, page: list[dict], requests: int) -> tuple[float, float]:
+    app = build_app(variant, page)
+    latencies = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(50):  # warm-up
+            await client.get("/products")
+        start = time.perf_counter()
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            resp = await client.get("/products")
+            latencies.append(time.perf_counter() - t0)
+            assert resp.status_code == 200
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, statistics.median(latencies) * 1000
+
+
+async def main(sizes: list[int], requests: int):
+    print(f"{'page size':>9}  {'variant':<12} {'req/s':>9} {'p50 ms':>8} {'speedup':>8}")
+    for size in sizes:
+        page = make_page(size)
+        baseline = None
+        for variant in ("stdlib", "orjson", "orjson+skip"):
+            rps, p50 = await run(variant, page, requests)
+            baseline = baseline or rps
+            print(f"{size:>9}  {variant:<12} {rps:>9.0f} {p50:>8.3f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 100])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.requests))
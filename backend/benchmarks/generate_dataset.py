@@ -0,0 +1,322 @@
+"""
+Synthetic dataset generator for scale testing: users, products, carts and
+orders shaped like the documents the routes write (see product_helper /
+order_helper), bulk-inserted with batched insert_many from parallel worker
+processes.
+
+Distributions are configurable: category skew (Zipf exponent over the
+categories), product popularity skew (which products end up in carts and
+orders), cart sizes (geometric with the given mean, capped) and the order
+status mix.  Generation is reproducible for the same --seed, --workers
+and --batch-size (they decide how the ranges are split and seeded).
+
+Every generated user's password is "password".  Product _ids, prices and
+created_at are derived from the product's index, so cart and order workers
+reference existing products without reading them back.
+
+Usage (from backend/):
+    python -m benchmarks.generate_dataset --db mini_amazon_scale --drop \\
+        --users 200000 --products 1000000 --orders 2000000 --workers 8
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from faker import Faker
+from pymongo import MongoClient
+
+from app.auth.utils import hash_password
+from app.config import MONGO_DB_NAME, MONGO_URL
+from app.indexes import INDEXES
+
+CATEGORIES = {
+    "Electronics": ["Headphones", "Speaker", "Charger", "Keyboard", "Monitor", "Camera"],
+    "Books": ["Novel", "Cookbook", "Biography", "Atlas", "Anthology", "Guide"],
+    "Kitchen": ["Blender", "Kettle", "Skillet", "Knife Set", "Mug", "Toaster"],
+    "Clothing": ["Jacket", "T-Shirt", "Sneakers", "Scarf", "Jeans", "Hoodie"],
+    "Home": ["Lamp", "Rug", "Pillow", "Curtains", "Clock", "Vase"],
+    "Toys": ["Puzzle", "Board Game", "Plush Bear", "Building Set", "Kite", "Yo-yo"],
+    "Sports": ["Yoga Mat", "Dumbbell", "Bicycle Helmet", "Tennis Racket", "Football", "Water Bottle"],
+    "Beauty": ["Lipstick", "Moisturizer", "Shampoo", "Perfume", "Nail Polish", "Face Mask"],
+    "Garden": ["Hose", "Planter", "Pruning Shears", "Seed Kit", "Gloves", "Watering Can"],
+    "Music": ["Guitar Strings", "Ukulele", "Drumsticks", "Vinyl Record", "Capo", "Metronome"],
+}
+CATEGORY_NAMES = list(CATEGORIES)
+EPOCH = datetime(2023, 1, 1)
+PASSWORD = "password"
+COLLECTIONS = ("users", "products", "carts", "orders")
+
+
+# ─── DETERMINISTIC PRODUCT ATTRIBUTES ────────────────────────────────────────
+def product_created_at(cfg: dict, i: int) -> datetime:
+    return EPOCH + timedelta(seconds=cfg["days"] * 86400 * i / max(cfg["products"], 1))
+
+
+def product_oid(cfg: dict, i: int) -> ObjectId:
+    # Timestamp prefix of created_at plus the index: unique and in
+    # insertion order, like real ObjectIds.
+    ts = int(product_created_at(cfg, i).timestamp())
+    return ObjectId(ts.to_bytes(4, "big") + i.to_bytes(8, "big"))
+
+
+def product_price(cfg: dict, i: int) -> float:
+    return round(min(random.Random(cfg["seed"] * 1_000_003 + i).lognormvariate(3.3, 0.9), 5000), 2)
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@example.com"
+
+
+# ─── DISTRIBUTIONS ───────────────────────────────────────────────────────────
+def category_weights(skew: float) -> list[float]:
+    return [1 / (rank + 1) ** skew for rank in range(len(CATEGORY_NAMES))]
+
+
+def pick_product(rng: random.Random, cfg: dict) -> int:
+    """
+    Product index with a popularity skew: 1 is uniform, higher values
+    concentrate picks on low indexes (the "bestsellers").
+    """
+    return min(int(cfg["products"] * rng.random() ** cfg["product_skew"]), cfg["products"] - 1)
+
+
+def cart_size(rng: random.Random, cfg: dict) -> int:
+    """
+    Geometric number of lines (at least 1) with mean `cart_mean`, capped.
+    """
+    p = 1 / max(cfg["cart_mean"], 1)
+    if p >= 1:
+        return 1
+    size = 1 + int(math.log(1 - rng.random()) / math.log(1 - p))
+    return min(size, cfg["cart_max"])
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        status, _, weight = part.partition("=")
+        mix[status.strip()] = float(weight)
+    return mix
+
+
+def cart_lines(rng: random.Random, cfg: dict) -> list[tuple[int, int]]:
+    lines = {}
+    for _ in range(cart_size(rng, cfg)):
+        i = pick_product(rng, cfg)
+        lines[i] = lines.get(i, 0) + rng.choice((1, 1, 1, 2, 3))
+    return list(lines.items())
+
+
+# ─── DOCUMENT FACTORIES ──────────────────────────────────────────────────────
+def make_user(fake: Faker, rng: random.Random, cfg: dict, i: int) -> dict:
+    return {
+        "name": fake.name(),
+        "email": user_email(i),
+        "hashed_password": cfg["hashed_password"],
+        "created_at": EPOCH + timedelta(seconds=rng.uniform(0, cfg["days"] * 86400)),
+        "is_admin": False,
+    }
+
+
+def make_product(fake: Faker, rng: random.Random, cfg: dict, i: int) -> dict:
+    category = rng.choices(CATEGORY_NAMES, weights=cfg["category_weights"])[0]
+    stock = rng.choice((0, rng.randint(1, 20), rng.randint(20, 500)))
+    return {
+        "_id": product_oid(cfg, i),
+        "name": f"{fake.color_name()} {fake.word().title()} {rng.choice(CATEGORIES[category])}",
+        "description": fake.paragraph(nb_sentences=3),
+        "price": product_price(cfg, i),
+        "in_stock": stock > 0,
+        "stock": stock,
+        "category": category,
+        "image": f"/uploads/products/{i}.jpg",
+        "created_at": product_created_at(cfg, i),
+    }
+
+
+def make_cart(fake: Faker, rng: random.Random, cfg: dict, i: int) -> dict:
+    return {
+        "user_email": user_email(i),
+        "items": [
+            {"product_id": str(product_oid(cfg, p)), "quantity": qty}
+            for p, qty in cart_lines(rng, cfg)
+        ],
+    }
+
+
+# Statuses an order passes through on its way to each final status.
+STATUS_PATHS = {
+    "pending": ["pending"],
+    "shipped": ["pending", "shipped"],
+    "delivered": ["pending", "shipped", "delivered"],
+    "cancelled": ["pending", "cancelled"],
+}
+
+
+def make_order(fake: Faker, rng: random.Random, cfg: dict, i: int) -> dict:
+    items = [
+        {"product_id": str(product_oid(cfg, p)), "quantity": qty, "price_at_purchase": product_price(cfg, p)}
+        for p, qty in cart_lines(rng, cfg)
+    ]
+    status = rng.choices(cfg["statuses"], weights=cfg["status_weights"])[0]
+    created_at = EPOCH + timedelta(seconds=rng.uniform(0, cfg["days"] * 86400))
+    created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)  # BSON keeps ms
+    history, at = [], created_at
+    for step in STATUS_PATHS.get(status, [status]):
+        history.append({"status": step, "timestamp": at})
+        at += timedelta(hours=rng.uniform(2, 96))
+    return {
+        "user_email": user_email(rng.randrange(cfg["users"])) if cfg["users"] else fake.email(),
+        "items": items,
+        "total_price": round(sum(it["price_at_purchase"] * it["quantity"] for it in items), 2),
+        "status": status,
+        "created_at": created_at,
+        "status_history": history,
+    }
+
+
+FACTORIES = {"users": make_user, "products": make_product, "carts": make_cart, "orders": make_order}
+
+
+# ─── WORKERS ─────────────────────────────────────────────────────────────────
+_client = None
+
+
+def _worker_init(url: str):
+    global _client
+    _client = MongoClient(url)
+
+
+def insert_range(cfg: dict, collection: str, start: int, count: int) -> int:
+    """
+    Generate documents [start, start + count) of `collection` and insert
+    them in batches.  Runs in a worker process.
+    """
+    fake = Faker()
+    fake.seed_instance(f"{cfg['seed']}:{collection}:{start}")
+    rng = random.Random(f"{cfg['seed']}:{collection}:{start}:rng")
+    make = FACTORIES[collection]
+    target = _client[cfg["db"]][collection]
+    batch = []
+    for i in range(start, start + count):
+        batch.append(make(fake, rng, cfg, i))
+        if len(batch) >= cfg["batch_size"]:
+            target.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        target.insert_many(batch, ordered=False)
+    return count
+
+
+def chunks(total: int, workers: int, batch_size: int):
+    """
+    A few chunks per worker (so they finish together), each a multiple of
+    the batch size.
+    """
+    size = max(batch_size, math.ceil(total / (workers * 4) / batch_size) * batch_size)
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def generate(cfg: dict, counts: dict[str, int], workers: int) -> list[tuple[str, int, float]]:
+    report = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(cfg["url"],)) as pool:
+        for collection in COLLECTIONS:
+            total = counts[collection]
+            if not total:
+                continue
+            start = time.perf_counter()
+            futures = [
+                pool.submit(insert_range, cfg, collection, first, n)
+                for first, n in chunks(total, workers, cfg["batch_size"])
+            ]
+            done = 0
+            for future in as_completed(futures):
+                done += future.result()
+                elapsed = time.perf_counter() - start
+                print(f"\r{collection:<9} {done:>10}/{total} {done / elapsed:>10.0f} docs/s", end="", flush=True)
+            elapsed = time.perf_counter() - start
+            print()
+            report.append((collection, total, elapsed))
+    return report
+
+
+def main(args):
+    mix = parse_mix(args.status_mix)
+    cfg = {
+        "url": args.url,
+        "db": args.db,
+        "seed": args.seed,
+        "batch_size": args.batch_size,
+        "days": args.days,
+        "users": args.users,
+        "products": args.products,
+        "category_weights": category_weights(args.category_skew),
+        "product_skew": args.product_skew,
+        "cart_mean": args.cart_mean,
+        "cart_max": args.cart_max,
+        "statuses": list(mix),
+        "status_weights": list(mix.values()),
+        "hashed_password": hash_password(PASSWORD),
+    }
+    if (args.carts or args.orders) and not args.products:
+        raise SystemExit("carts and orders reference products: --products must be > 0")
+    if args.carts > args.users:
+        raise SystemExit("one cart per user: --carts must be <= --users")
+
+    db = MongoClient(args.url)[args.db]
+    if args.drop:
+        for collection in COLLECTIONS:
+            db[collection].drop()
+
+    counts = {"users": args.users, "products": args.products, "carts": args.carts, "orders": args.orders}
+    report = generate(cfg, counts, args.workers)
+
+    # Indexes after the bulk load: building them once is much cheaper than
+    # maintaining them on every insert.
+    if not args.skip_indexes:
+        start = time.perf_counter()
+        for collection, models in INDEXES.items():
+            db[collection].create_indexes(models)
+        print(f"indexes built in {time.perf_counter() - start:.1f} s")
+
+    total_docs = sum(n for _, n, _ in report)
+    total_s = sum(s for _, _, s in report)
+    print(f"\n{'collection':<10} {'docs':>10} {'seconds':>9} {'docs/s':>10}")
+    for collection, n, seconds in report:
+        print(f"{collection:<10} {n:>10} {seconds:>9.1f} {n / seconds:>10.0f}")
+    if total_s:
+        print(f"{'total':<10} {total_docs:>10} {total_s:>9.1f} {total_docs / total_s:>10.0f}")
+    if args.orders:
+        print("order counters: GET /admin/stats?refresh=true recomputes them")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=MONGO_URL)
+    parser.add_argument("--db", default=MONGO_DB_NAME)
+    parser.add_argument("--drop", action="store_true", help="drop the four collections first")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--carts", type=int, default=5_000, help="users 0..N-1 get a cart")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--category-skew", type=float, default=1.0, help="Zipf exponent over categories (0 = even)")
+    parser.add_argument("--product-skew", type=float, default=2.0, help="popularity skew of picked products (1 = uniform)")
+    parser.add_argument("--cart-mean", type=float, default=2.5, help="mean lines per cart/order")
+    parser.add_argument("--cart-max", type=int, default=20)
+    parser.add_argument(
+        "--status-mix", default="pending=0.15,shipped=0.25,delivered=0.55,cancelled=0.05",
+        help="order status weights",
+    )
+    parser.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-indexes", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,258 @@
+"""
+HTTP load test: scripted shopper journeys through the whole app (routing,
+auth, caches, MongoDB) with httpx against the ASGI app, no network server.
+
+Each virtual user loops over a journey - log in, browse the catalog (two
+keyset pages, a product, the categories), search, add to cart, check out -
+until the run ends.  Latency is recorded per step and reported as
+p50/p95/p99 with throughput and error counts.
+
+Needs a MongoDB at MONGO_URL (e.g. `docker compose up mongo`); the app is
+pointed at a scratch database (MONGO_DB_NAME) that is seeded first and
+dropped afterwards.
+
+Thresholds make it a regression gate: a JSON file of per-step limits
+(see benchmarks/load_thresholds.json), and/or a previous --json result as
+--baseline with a maximum allowed p95 regression.  Exits 1 on any breach.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --users 50 --duration 30 --json results.json
+    python -m benchmarks.load_test --baseline results.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+LOAD_DB = "mini_amazon_load_test"
+# Before any app import, so app.database binds the scratch database.
+os.environ.setdefault("MONGO_DB_NAME", LOAD_DB)
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.auth.utils import hash_password  # noqa: E402
+from app.database import client, db, open_database  # noqa: E402
+from app.indexes import ensure_indexes  # noqa: E402
+from app.main import app  # noqa: E402
+
+PASSWORD = "loadtest-password"
+CATEGORIES = ["Books", "Electronics", "Kitchen", "Toys", "Garden", "Sports", "Beauty", "Music"]
+WORDS = ["wireless", "classic", "organic", "portable", "premium", "compact", "vintage", "smart", "steel", "cotton"]
+NOUNS = ["headphones", "novel", "blender", "puzzle", "lamp", "backpack", "kettle", "speaker", "mug", "jacket"]
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), "load_thresholds.json")
+
+
+# ─── DATASET ─────────────────────────────────────────────────────────────────
+async def seed(users: int, products: int) -> tuple[list[str], list[str]]:
+    """
+    Reset the scratch database with `users` shoppers and `products`
+    products.  Every user shares one bcrypt hash so seeding stays fast.
+    """
+    if db.name != LOAD_DB:
+        raise SystemExit(f"refusing to seed {db.name!r}; MONGO_DB_NAME must be {LOAD_DB!r}")
+    await client.drop_database(LOAD_DB)
+    await ensure_indexes(db)
+
+    hashed = hash_password(PASSWORD)
+    emails = [f"shopper{i}@load.test" for i in range(users)]
+    now = datetime.utcnow()
+    await db.users.insert_many([
+        {"name": f"Shopper {i}", "email": e, "hashed_password": hashed, "created_at": now, "is_admin": False}
+        for i, e in enumerate(emails)
+    ])
+
+    rng = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=365)
+    result = await db.products.insert_many([
+        {
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(NOUNS)} {i}",
+            "description": " ".join(rng.choices(WORDS + NOUNS, k=20)),
+            "price": round(rng.uniform(2, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "in_stock": True,
+            "stock": 1_000_000,
+            "image": f"/uploads/products/{i}.jpg",
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(products)
+    ])
+    return emails, [str(oid) for oid in result.inserted_ids]
+
+
+# ─── JOURNEYS ────────────────────────────────────────────────────────────────
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.attempts: dict[str, int] = defaultdict(int)
+
+    async def step(self, name: str, request, expect: int = 200):
+        self.attempts[name] += 1
+        start = time.perf_counter()
+        try:
+            resp = await request
+        except Exception:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+        if resp.status_code != expect:
+            self.errors[name] += 1
+            return None
+        return resp
+
+
+async def shopper(http: AsyncClient, rec: Recorder, email: str, product_ids: list[str], deadline: float, seed_: int):
+    rng = random.Random(seed_)
+    while time.perf_counter() < deadline:
+        resp = await rec.step("login", http.post("/auth/login", data={"username": email, "password": PASSWORD}))
+        if resp is None:
+            continue
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        page = await rec.step("browse_list", http.get("/products/", params={"limit": 12}))
+        cursor = page.headers.get("X-Next-Cursor") if page is not None else None
+        if cursor:
+            await rec.step("browse_list", http.get("/products/", params={"limit": 12, "cursor": cursor}))
+        await rec.step("product_detail", http.get(f"/products/{rng.choice(product_ids)}"))
+        await rec.step("categories", http.get("/products/categories"))
+
+        await rec.step("search", http.get("/products/search", params={"q": rng.choice(NOUNS)}))
+        await rec.step("search_filter", http.get(
+            "/products/search", params={"category": rng.choice(CATEGORIES), "max_price": 100}
+        ))
+
+        for product_id in rng.sample(product_ids, k=rng.randint(1, 3)):
+            await rec.step("cart_add", http.post(
+                "/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers
+            ))
+        await rec.step("checkout", http.post(
+            "/orders/", headers={**headers, "Idempotency-Key": f"{email}-{rng.random()}"}
+        ), expect=201)
+
+
+# ─── REPORT ──────────────────────────────────────────────────────────────────
+def percentile(sorted_samples: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(rec: Recorder, elapsed: float) -> dict:
+    steps = {}
+    for name in sorted(rec.attempts):
+        samples = sorted(rec.latencies[name])
+        count = len(samples)
+        steps[name] = {
+            "count": count,
+            "errors": rec.errors[name],
+            "error_rate": round(rec.errors[name] / rec.attempts[name], 4),
+            "rps": round(count / elapsed, 1),
+            "mean_ms": round(sum(samples) / count, 2) if count else 0.0,
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "max_ms": round(samples[-1], 2) if samples else 0.0,
+        }
+    return steps
+
+
+def print_report(steps: dict, elapsed: float):
+    print(f"{'step':<16} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, s in steps.items():
+        print(
+            f"{name:<16} {s['count']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}"
+        )
+    total = sum(s["count"] for s in steps.values())
+    print(f"{total} requests in {elapsed:.1f} s ({total / elapsed:.0f} req/s)")
+
+
+def check_thresholds(steps: dict, thresholds: dict) -> list[str]:
+    """
+    `thresholds` maps a step name (or "*" for every step) to limits named
+    like the report fields, e.g. {"checkout": {"p95_ms": 250, "error_rate": 0.01}}.
+    """
+    breaches = []
+    for name, s in steps.items():
+        limits = {**thresholds.get("*", {}), **thresholds.get(name, {})}
+        for field, limit in limits.items():
+            if s.get(field, 0) > limit:
+                breaches.append(f"{name}.{field} = {s[field]} > {limit}")
+    return breaches
+
+
+def check_baseline(steps: dict, baseline: dict, max_regression: float) -> list[str]:
+    breaches = []
+    for name, s in steps.items():
+        before = baseline.get("steps", {}).get(name)
+        if before and before["p95_ms"] and s["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            breaches.append(
+                f"{name}.p95_ms = {s['p95_ms']} vs baseline {before['p95_ms']} (> +{max_regression:.0%})"
+            )
+    return breaches
+
+
+# ─── MAIN ────────────────────────────────────────────────────────────────────
+async def main(args) -> int:
+    await open_database()
+    emails, product_ids = await seed(args.users, args.products)
+    rec = Recorder()
+    elapsed = 0.0
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://load") as http:
+            # Warm caches and the search index outside the measured window.
+            await http.get("/products/search", params={"q": NOUNS[0]})
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(
+                shopper(http, rec, email, product_ids, deadline, seed_=i)
+                for i, email in enumerate(emails)
+            ))
+            elapsed = time.perf_counter() - start
+    finally:
+        if not args.keep_data:
+            await client.drop_database(LOAD_DB)
+
+    steps = summarize(rec, elapsed)
+    print_report(steps, elapsed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "config": {"users": args.users, "products": args.products, "duration": args.duration},
+                "elapsed_s": round(elapsed, 2),
+                "steps": steps,
+            }, f, indent=2)
+
+    breaches = []
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            breaches += check_thresholds(steps, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            breaches += check_baseline(steps, json.load(f), args.max_regression)
+    for breach in breaches:
+        print(f"THRESHOLD BREACHED: {breach}")
+    return 1 if breaches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=20, help="seconds")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="per-step limits (JSON); '' to skip")
+    parser.add_argument("--baseline", help="previous --json result to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth vs baseline")
+    parser.add_argument("--keep-data", action="store_true", help="don't drop the scratch database")
+    sys.exit(asyncio.run(main(parser.parse_args())))
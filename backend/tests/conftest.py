@@ -1,7 +1,14 @@
 # tests/conftest.py
 import pytest
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
 from httpx import AsyncClient, ASGITransport
 from app.main import app
+from app.auth.dependencies import invalidate_principal
+from app.auth.utils import create_access_token
+from app.database import db
+from app.db_tracing import db_call_scope
+from app.loop_monitor import LoopMonitor
 
 pytestmark = pytest.mark.asyncio(scope="function")
 # Ensure consistent use of asyncio as the event loop backend
@@ -41,3 +48,73 @@ async def async_client():
         base_url="http://test"
     ) as client:
         yield client
+
+@pytest.fixture
+def make_shopper():
+    """
+    Create a buyer straight in MongoDB (a /auth/signup-shaped user document,
+    minus the bcrypt cost, so hundreds of them are cheap) with an optional
+    cart, and return auth headers for it.  Earlier carts, orders and
+    idempotency keys of the same email are cleared.  Pass is_admin=True
+    for the /admin routes.
+
+        headers = await make_shopper("buyer@example.com", cart=[{"product_id": pid, "quantity": 1}])
+    """
+    async def make(email: str, cart: list | None = None, is_admin: bool = False) -> dict:
+        for collection in (db.carts, db.orders, db.idempotency_keys):
+            await collection.delete_many({"user_email": email})
+        await db.users.delete_many({"email": email})
+        await db.users.insert_one({
+            "name": email.split("@")[0],
+            "email": email,
+            "hashed_password": "x",
+            "created_at": datetime.utcnow(),
+            "is_admin": is_admin,
+        })
+        invalidate_principal(email)
+        if cart is not None:
+            await db.carts.insert_one({"user_email": email, "items": cart})
+        return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+    return make
+
+@pytest.fixture
+def max_db_calls():
+    """
+    Fail if the block makes more MongoDB round trips than `limit`:
+
+        with max_db_calls(3):
+            await async_client.get("/orders/", headers=headers)
+
+    ASGITransport runs the app in the test's own task, so every command the
+    request issues is counted (see app/db_tracing).
+    """
+    @contextmanager
+    def check(limit: int):
+        with db_call_scope() as stats:
+            yield stats
+        assert stats.calls <= limit, f"{stats.calls} DB round trips (max {limit}): {stats.commands}"
+    return check
+
+@pytest.fixture
+def max_loop_block():
+    """
+    Fail if anything blocks the event loop for longer than `budget_ms`
+    inside the block, showing the stack that was blocking it:
+
+        async with max_loop_block(50):
+            await async_client.post("/products/upload-image", ...)
+    """
+    @asynccontextmanager
+    async def check(budget_ms: float):
+        monitor = LoopMonitor(interval_ms=5, block_threshold_ms=budget_ms)
+        await monitor.start()
+        try:
+            yield monitor
+        finally:
+            await monitor.stop()
+        stall = monitor.worst_stall()
+        assert monitor.max_lag_ms <= budget_ms, (
+            f"event loop blocked for {monitor.max_lag_ms:.0f} ms (budget {budget_ms} ms)"
+            + (f" at:\n{stall['stack']}" if stall else "")
+        )
+    return check
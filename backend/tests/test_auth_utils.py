@@ -1,7 +1,7 @@
 import pytest
 from app.auth.utils import hash_password, verify_password, create_access_token, decode_access_token
 from fastapi import HTTPException
-from app.models.user_model import UserResponse
+from app.schemas.user_schema import UserResponse
 from datetime import datetime
 
 def test_verify_password():
@@ -31,3 +31,60 @@ async def test_protected_route_with_invalid_token(async_client):
     response = await async_client.get("/auth/user", headers=headers)
     assert response.status_code == 401
     assert response.json()["detail"] == "Could not validate credentials"
+
+@pytest.mark.anyio
+async def test_async_password_helpers():
+    from app.auth.utils import hash_password_async, verify_password_async
+    hashed = await hash_password_async("mypassword")
+    assert await verify_password_async("mypassword", hashed)
+    assert not await verify_password_async("wrongpass", hashed)
+
+@pytest.mark.anyio
+async def test_password_pool_rejects_when_saturated():
+    import asyncio, time
+    from app.auth.utils import PasswordPool
+
+    pool = PasswordPool(workers=1, max_queue=1, retry_after=2)
+    busy = [asyncio.create_task(pool.run(time.sleep, 0.2)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc:
+        await pool.run(time.sleep, 0)
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "2"
+
+    await asyncio.gather(*busy)
+    stats = pool.stats()
+    assert stats["completed"] == 2 and stats["rejected"] == 1
+    assert stats["queue_wait_max_ms"] >= 100  # second call waited for the only worker
+    pool.shutdown()
+
+def test_token_subject_memoizes_verified_tokens():
+    from datetime import timedelta
+    from app.auth.dependencies import token_cache, token_subject
+
+    token = create_access_token({"sub": "memo@example.com"})
+    assert token_subject(token) == "memo@example.com"
+    assert token in token_cache
+
+    expired = create_access_token({"sub": "memo@example.com"}, expires_delta=timedelta(minutes=-1))
+    assert token_subject(expired) is None
+    assert expired not in token_cache
+    assert token_subject("not.a.token") is None
+
+@pytest.mark.anyio
+async def test_get_current_user_served_from_principal_cache():
+    from app.auth.dependencies import get_current_user, invalidate_principal, principal_cache
+
+    user = UserResponse(
+        id="000000000000000000000001", name="Cached", email="cached@example.com",
+        is_admin=False, created_at=datetime.utcnow(),
+    )
+    principal_cache.set(user.email, user)
+    token = create_access_token({"sub": user.email})
+
+    # No database round trip needed while the principal is cached
+    assert await get_current_user(token) is user
+
+    invalidate_principal(user.email)
+    assert user.email not in principal_cache
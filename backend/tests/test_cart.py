@@ -96,3 +96,33 @@ async def test_remove_cart_item(async_client):
     }, headers=headers, follow_redirects=True)
     assert remove_resp.status_code == 200
     assert all(item["product_id"] != product_id for item in remove_resp.json()["items"])
+
+
+@pytest.mark.anyio
+async def test_concurrent_adds_do_not_lose_increments(async_client):
+    import asyncio
+    from bson import ObjectId
+
+    await async_client.post("/auth/signup", json={
+        "name": "Two Tabs",
+        "email": "twotabs@example.com",
+        "password": "pass"
+    })
+    login = await async_client.post("/auth/login", data={
+        "username": "twotabs@example.com",
+        "password": "pass"
+    })
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await async_client.delete("/cart/", headers=headers)
+
+    product_id = str(ObjectId())
+    responses = await asyncio.gather(*[
+        async_client.post("/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers)
+        for _ in range(25)
+    ])
+    assert all(r.status_code == 200 for r in responses)
+
+    cart = (await async_client.get("/cart/", headers=headers)).json()
+    items = [i for i in cart["items"] if i["product_id"] == product_id]
+    assert len(items) == 1
+    assert items[0]["quantity"] == 25
@@ -0,0 +1,104 @@
+import pytest
+from app.catalog_cache import CatalogCache, MemoryBackend
+from app.utils.ttl_cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction_and_counters():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)           # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.hits == 2 and cache.misses == 1
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("k", "v", ttl_seconds=-1)
+    assert cache.get("k") is None
+    assert cache.expirations == 1
+
+
+@pytest.mark.anyio
+async def test_catalog_cache_invalidation():
+    cache = CatalogCache(MemoryBackend(max_entries=100, ttl_seconds=60))
+    await cache.set_product("p1", {"id": "p1"})
+    await cache.set_product("p2", {"id": "p2"})
+    await cache.set_query("list", {"items": []}, page=1, limit=12)
+    await cache.set_categories(["Books"])
+
+    await cache.invalidate_product("p1", categories=False)
+
+    assert await cache.get_product("p1") is None
+    assert await cache.get_product("p2") == {"id": "p2"}
+    assert await cache.get_query("list", page=1, limit=12) is None
+    assert await cache.get_categories() == ["Books"]
+
+    await cache.invalidate_product()
+    assert await cache.get_categories() is None
+
+
+@pytest.mark.anyio
+async def test_catalog_cache_query_keys_ignore_param_order_and_nones():
+    cache = CatalogCache(MemoryBackend(max_entries=100, ttl_seconds=60))
+    await cache.set_query("search", "hit", q="phone", limit=12, category=None)
+    assert await cache.get_query("search", limit=12, q="phone") == "hit"
+
+
+class BrokenBackend(MemoryBackend):
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.anyio
+async def test_catalog_cache_backend_errors_are_misses():
+    cache = CatalogCache(BrokenBackend(max_entries=10, ttl_seconds=60))
+    assert await cache.get_product("p1") is None
+    assert cache.stats()["errors"] == 1
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        self.ttls[key] = ex
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.mark.anyio
+async def test_redis_backend_queries_expire_per_key_and_invalidate_by_generation():
+    pytest.importorskip("redis")
+    from app.catalog_cache import RedisBackend
+
+    backend = RedisBackend("redis://localhost:6379/0", ttl_seconds=60)
+    backend.redis = FakeRedis()
+    cache = CatalogCache(backend)
+
+    await cache.set_query("list", {"items": [1]}, page=1)
+    await cache.set_query("list", {"items": [2]}, page=2)
+    query_keys = [k for k in backend.redis.data if k.startswith("catalog:q:")]
+    assert len(query_keys) == 2
+    assert all(backend.redis.ttls[k] == 60 for k in query_keys)
+    assert await cache.get_query("list", page=1) == {"items": [1]}
+
+    await cache.invalidate_product(categories=False)
+
+    assert await cache.get_query("list", page=1) is None
+    await cache.set_query("list", {"items": [3]}, page=1)
+    assert await cache.get_query("list", page=1) == {"items": [3]}
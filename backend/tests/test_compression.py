@@ -0,0 +1,98 @@
+import gzip
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from starlette.datastructures import Headers
+
+from app.compression import (
+    CompressionMiddleware,
+    CompressionStats,
+    PrecompressedStaticFiles,
+    accepted_encodings,
+)
+
+
+def make_app(stats, static_dir=None):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, stats=stats)
+
+    @app.get("/big")
+    async def big():
+        return {"items": ["product"] * 200}
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse("x" * 1000, media_type="application/octet-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield b'{"chunk": "' + b"y" * 100 + b'"}\n'
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    if static_dir:
+        app.mount("/uploads", PrecompressedStaticFiles(directory=static_dir, stats=stats))
+    return app
+
+
+async def get(app, path, encoding="gzip"):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path, headers={"Accept-Encoding": encoding})
+
+
+def test_accepted_encodings_honours_q_zero():
+    assert accepted_encodings(Headers({"accept-encoding": "gzip;q=0, deflate"})) == set()
+    assert "gzip" in accepted_encodings(Headers({"accept-encoding": "*"}))
+
+
+@pytest.mark.anyio
+async def test_large_json_is_gzipped_and_counted():
+    stats = CompressionStats()
+    resp = await get(make_app(stats), "/big")
+
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert resp.json()["items"][0] == "product"  # httpx decodes it
+    assert stats.stats()["bytes_saved"] > 0
+
+
+@pytest.mark.anyio
+async def test_threshold_allowlist_and_identity_are_left_alone():
+    stats = CompressionStats()
+    app = make_app(stats)
+    assert "content-encoding" not in (await get(app, "/small")).headers
+    assert "content-encoding" not in (await get(app, "/text")).headers
+    assert "content-encoding" not in (await get(app, "/big", encoding="identity")).headers
+    assert stats.skipped["too_small"] == 1 and stats.skipped["content_type"] == 1
+
+
+@pytest.mark.anyio
+async def test_streamed_body_is_compressed_incrementally():
+    resp = await get(make_app(CompressionStats()), "/stream")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.text.count("chunk") == 10
+
+
+@pytest.mark.anyio
+async def test_precompressed_sidecar_is_served(tmp_path):
+    original = b'{"catalog": "' + b"z" * 5000 + b'"}'
+    (tmp_path / "export.json").write_bytes(original)
+    sidecar = tmp_path / "export.json.gz"
+    sidecar.write_bytes(gzip.compress(original))
+    os.utime(sidecar, (os.path.getmtime(tmp_path / "export.json") + 1,) * 2)
+
+    stats = CompressionStats()
+    resp = await get(make_app(stats, static_dir=str(tmp_path)), "/uploads/export.json")
+
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["content-type"].startswith("application/json")
+    assert resp.content == original
+    assert stats.sidecar_hits == 1
+    assert stats.stats()["responses"]["gzip"] == 0  # not compressed twice
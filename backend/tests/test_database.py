@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+from app.database import PoolStats, catalog_db, client_options, db, pool_stats
+
+
+def test_pool_stats_gauges_and_wait_histogram():
+    stats = PoolStats(max_pool_size=4)
+    for _ in range(2):
+        stats.connection_created(None)
+    stats.connection_checked_out(SimpleNamespace(duration=0.0005))
+    stats.connection_checked_out(SimpleNamespace(duration=0.2))
+    stats.connection_checked_in(None)
+    stats.connection_check_out_failed(SimpleNamespace(reason="timeout"))
+
+    report = stats.stats()
+    assert report["open"] == 2
+    assert report["in_use"] == 1 and report["in_use_max"] == 2
+    assert report["utilization"] == 0.25
+    assert report["checkouts"] == 2
+    assert report["checkout_failures"] == {"timeout": 1}
+    assert report["wait_ms_max"] == 200.0
+    assert report["wait_ms_histogram"]["<=1ms"] == 1
+    assert report["wait_ms_histogram"]["<=500ms"] == 1
+
+
+def test_client_is_built_from_settings():
+    options = client_options()
+    assert pool_stats in options["event_listeners"]
+    assert options["maxPoolSize"] >= options["minPoolSize"]
+    assert catalog_db.name == db.name
@@ -0,0 +1,74 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.db_tracing import (
+    CommandTracer,
+    ServerTimingMiddleware,
+    command_shape,
+    current_db_stats,
+    db_call_scope,
+)
+
+
+def run_command(tracer, command: dict, micros: int, request_id: int = 1):
+    name = next(iter(command))
+    tracer.started(SimpleNamespace(
+        command=command, command_name=name, database_name="mini_amazon",
+        connection_id=("localhost", 27017), request_id=request_id,
+    ))
+    tracer.succeeded(SimpleNamespace(
+        command_name=name, duration_micros=micros,
+        connection_id=("localhost", 27017), request_id=request_id,
+    ))
+
+
+def test_command_shape_hides_literals():
+    command = {
+        "find": "products",
+        "filter": {"category": "Books", "price": {"$gte": 5}, "_id": {"$in": [1, 2, 3]}},
+        "sort": {"created_at": 1},
+        "limit": 12,
+    }
+    assert command_shape(command) == {
+        "filter": {"category": "?", "price": {"$gte": "?"}, "_id": {"$in": ["?"]}},
+        "sort": {"created_at": "?"},
+    }
+
+
+def test_tracer_attributes_calls_and_logs_slow_commands(caplog):
+    tracer = CommandTracer(slow_ms=50)
+    with caplog.at_level(logging.WARNING, logger="app.db_tracing"):
+        with db_call_scope() as outer:
+            with db_call_scope() as inner:
+                run_command(tracer, {"find": "products", "filter": {"name": "secret"}}, 2000, request_id=1)
+            run_command(tracer, {"insert": "orders"}, 80000, request_id=2)
+
+    assert inner.calls == 1 and inner.commands == ["find"]
+    assert outer.calls == 2 and outer.total_ms == 82.0
+    stats = tracer.stats()
+    assert stats["calls"] == {"find": 1, "insert": 1}
+    assert stats["slow"] == 1
+    assert "slow mongodb insert on mini_amazon.orders: 80.0 ms" in caplog.text
+    assert "secret" not in caplog.text
+
+
+@pytest.mark.anyio
+async def test_server_timing_header():
+    tracer = CommandTracer(slow_ms=0)
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/")
+    async def root():
+        run_command(tracer, {"find": "carts"}, 1500, request_id=1)
+        run_command(tracer, {"update": "carts"}, 500, request_id=2)
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/")
+    assert resp.headers["server-timing"] == 'db;dur=2.0;desc="2 calls"'
+    assert current_db_stats.get() is None
@@ -0,0 +1,62 @@
+from datetime import datetime
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+import pytest
+
+from app.compression import CompressionMiddleware, CompressionStats
+from app.utils.http_cache import conditional_response, etag_matches, http_date, make_etag
+
+LAST_MODIFIED = datetime(2025, 6, 1, 12, 30, 15, 500000)
+BODY = b'{"name":"' + b"x" * 2000 + b'"}'
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, stats=CompressionStats())
+
+    @app.get("/product")
+    async def product(request: Request):
+        return conditional_response(request, BODY, make_etag(BODY), "public, max-age=60", LAST_MODIFIED)
+
+    return app
+
+
+async def get(headers):
+    async with AsyncClient(transport=ASGITransport(app=make_app()), base_url="http://test") as client:
+        return await client.get("/product", headers=headers)
+
+
+def test_etag_is_content_derived_and_compared_weakly():
+    etag = make_etag(BODY)
+    assert etag == make_etag(BODY) != make_etag(BODY + b" ")
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+
+
+@pytest.mark.anyio
+async def test_validators_and_cache_control_are_sent():
+    resp = await get({"Accept-Encoding": "identity"})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] == make_etag(BODY)
+    assert resp.headers["last-modified"] == "Sun, 01 Jun 2025 12:30:15 GMT"
+    assert resp.headers["cache-control"] == "public, max-age=60"
+
+
+@pytest.mark.anyio
+async def test_if_none_match_returns_304_even_for_compressed_etag():
+    first = await get({"Accept-Encoding": "gzip"})
+    assert first.headers["etag"].startswith("W/")  # weakened with the gzip coding
+
+    again = await get({"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+@pytest.mark.anyio
+async def test_if_modified_since():
+    assert (await get({"If-Modified-Since": http_date(LAST_MODIFIED)})).status_code == 304
+    assert (await get({"If-Modified-Since": "Sat, 31 May 2025 00:00:00 GMT"})).status_code == 200
+    # If-None-Match takes precedence when both are present
+    both = {"If-None-Match": '"stale"', "If-Modified-Since": http_date(LAST_MODIFIED)}
+    assert (await get(both)).status_code == 200
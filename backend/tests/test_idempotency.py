@@ -0,0 +1,27 @@
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import OperationFailure
+
+from app.utils.idempotency import claim_key
+
+
+class NoIndexCollection:
+    """
+    A collection whose unique index can't be built (e.g. duplicates left
+    over from a time without it); nothing else may be touched.
+    """
+
+    full_name = "test.idempotency_no_index"
+
+    async def create_indexes(self, models):
+        raise OperationFailure("E11000 duplicate key error")
+
+    def __getattr__(self, name):
+        raise AssertionError(f"claim_key used {name}() without the unique index")
+
+
+@pytest.mark.anyio
+async def test_claim_fails_closed_without_unique_index():
+    with pytest.raises(HTTPException) as exc:
+        await claim_key(NoIndexCollection(), "a@example.com", "key-1")
+    assert exc.value.status_code == 503
@@ -0,0 +1,23 @@
+from app.indexes import INDEXES, QUERY_SHAPES, plan_stages
+
+
+def test_plan_stages_flattens_nested_plans():
+    plan = {
+        "stage": "FETCH",
+        "inputStage": {
+            "stage": "OR",
+            "inputStages": [
+                {"stage": "IXSCAN", "indexName": "price_id"},
+                {"stage": "COLLSCAN"},
+            ],
+        },
+    }
+    assert plan_stages(plan) == ["FETCH", "OR", "COLLSCAN", "IXSCAN"]
+
+
+def test_plan_stages_handles_sbe_wrapper():
+    assert plan_stages({"queryPlan": {"stage": "IXSCAN"}}) == ["IXSCAN"]
+
+
+def test_every_checked_collection_has_indexes():
+    assert {collection for _, collection, _, _ in QUERY_SHAPES} <= set(INDEXES)
@@ -0,0 +1,77 @@
+import asyncio
+import io
+import time
+
+import pytest
+from pathlib import Path
+from starlette.datastructures import UploadFile
+
+from app.loop_monitor import LoopMonitor
+from app.routes import admin_routes
+from app.utils.uploads import save_upload
+
+
+def blocking_call():
+    time.sleep(0.15)
+
+
+@pytest.mark.anyio
+async def test_blocking_call_is_caught_with_its_stack():
+    monitor = LoopMonitor(interval_ms=5, block_threshold_ms=50)
+    await monitor.start()
+    await asyncio.sleep(0.02)
+    blocking_call()
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["lag_ms_max"] >= 100
+    assert stats["stalls"] == 1
+    stall = monitor.worst_stall()
+    assert "blocking_call" in stall["stack"]
+    assert stall["blocked_ms"] >= 100
+
+
+@pytest.mark.anyio
+async def test_awaiting_does_not_count_as_blocking():
+    monitor = LoopMonitor(interval_ms=5, block_threshold_ms=50)
+    await monitor.start()
+    await asyncio.gather(*(asyncio.sleep(0.01) for _ in range(100)))
+    await monitor.stop()
+
+    assert monitor.stats()["stalls"] == 0
+    assert not monitor.running
+
+
+@pytest.mark.anyio
+async def test_max_loop_block_fails_on_a_blocking_handler(max_loop_block):
+    with pytest.raises(AssertionError, match="blocking_call"):
+        async with max_loop_block(50):
+            blocking_call()
+
+
+@pytest.mark.anyio
+async def test_save_upload_copies_off_the_loop(tmp_path, max_loop_block):
+    payload = b"x" * (8 * 1024 * 1024)
+    upload = UploadFile(io.BytesIO(payload), filename="big.bin")
+    async with max_loop_block(50):
+        path = await save_upload(upload, str(tmp_path / "products"))
+    assert Path(path).read_bytes() == payload
+
+
+@pytest.mark.anyio
+async def test_upload_image_route_stays_off_the_loop(async_client, make_shopper, max_loop_block, tmp_path, monkeypatch):
+    monkeypatch.setattr(admin_routes, "UPLOAD_DIR", str(tmp_path / "products"))
+    headers = await make_shopper("uploader@example.com", is_admin=True)
+    payload = b"x" * (8 * 1024 * 1024)
+
+    async with max_loop_block(50):
+        resp = await async_client.post(
+            "/admin/products/upload-image",
+            files={"file": ("big.jpg", payload, "image/jpeg")},
+            headers=headers,
+        )
+
+    assert resp.status_code == 200
+    assert resp.json() == {"url": "/uploads/products/big.jpg"}
+    assert (tmp_path / "products" / "big.jpg").read_bytes() == payload
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.metrics import MetricsMiddleware, MetricsRegistry, router_of
+
+
+def make_app(registry):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/products/{product_id}")
+    async def product(product_id: str):
+        if product_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": product_id}
+
+    return app
+
+
+def test_router_of_bounds_cardinality():
+    assert router_of("/products/abc") == "products"
+    assert router_of("/") == "root"
+    assert router_of("/wp-admin/setup.php") == "other"
+
+
+@pytest.mark.anyio
+async def test_latency_histogram_by_route_template_and_status():
+    registry = MetricsRegistry(prefix="t")
+    async with AsyncClient(transport=ASGITransport(app=make_app(registry)), base_url="http://test") as client:
+        await client.get("/products/a")
+        await client.get("/products/b")
+        await client.get("/products/missing")
+        await client.get("/nowhere")
+
+    text = registry.render()
+    ok = 'router="products",route="/products/{product_id}",method="GET",status="200"'
+    assert f"t_http_request_duration_seconds_count{{{ok}}} 2" in text
+    assert f't_http_request_duration_seconds_bucket{{{ok},le="+Inf"}} 2' in text
+    assert 'route="/products/{product_id}",method="GET",status="404"' in text
+    assert 'router="other",route="/other/*",method="GET",status="404"' in text
+    assert 't_http_requests_in_flight{router="products"} 0' in text
+
+
+def test_collectors_flatten_stats_dicts():
+    registry = MetricsRegistry(prefix="t")
+    registry.add_collector("ws", lambda: {"connections": 3, "broker": "memory", "responses": {"gzip": 2}})
+    registry.add_collector("broken", lambda: 1 / 0)
+
+    text = registry.render()
+    assert "t_ws_connections 3" in text
+    assert 't_ws_responses{key="gzip"} 2' in text
+    assert "broker" not in text
+    assert "t_metrics_collector_errors 1" in text
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint(async_client):
+    resp = await async_client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "mini_amazon_ws_connections" in resp.text
+    assert "mini_amazon_db_pool_max_pool_size" in resp.text
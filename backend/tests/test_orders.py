@@ -174,3 +174,135 @@ async def test_update_order_invalid_status(async_client):
     assert response.status_code == 400
     assert response.json()["detail"] == "Invalid status value"
 
+
+
+@pytest.mark.anyio
+async def test_concurrent_checkout_never_oversells(async_client, make_shopper):
+    import asyncio
+    from datetime import datetime
+    from app.database import db
+
+    stock, buyers = 40, 300
+    product = {
+        "name": "Limited Drop",
+        "description": "Only a few units",
+        "price": 25.0,
+        "in_stock": True,
+        "stock": stock,
+        "created_at": datetime.utcnow(),
+    }
+    await db.products.insert_one(product)
+    product_id = str(product["_id"])
+
+    cart = [{"product_id": product_id, "quantity": 1}]
+    headers = await asyncio.gather(*[
+        make_shopper(f"drop-buyer-{i}@example.com", cart=cart) for i in range(buyers)
+    ])
+
+    responses = await asyncio.gather(*[async_client.post("/orders/", headers=h) for h in headers])
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(201) == stock
+    assert statuses.count(409) == buyers - stock
+
+    remaining = await db.products.find_one({"_id": product["_id"]})
+    assert remaining["stock"] == 0
+    assert remaining["in_stock"] is False
+    assert await db.orders.count_documents({"items.product_id": product_id}) == stock
+
+
+@pytest.mark.anyio
+async def test_idempotent_retries_place_one_order(async_client, make_shopper):
+    import asyncio
+    from datetime import datetime
+    from bson import ObjectId
+    from app.database import db
+
+    email = "retrying-client@example.com"
+    product = {"name": "Retry Product", "price": 12.0, "in_stock": True, "stock": 100, "created_at": datetime.utcnow()}
+    await db.products.insert_one(product)
+    try:
+        headers = await make_shopper(email, cart=[{"product_id": str(product["_id"]), "quantity": 2}])
+        headers["Idempotency-Key"] = str(ObjectId())
+
+        # No lifespan under ASGITransport: claim_key must create the unique
+        # index itself before the first claim.
+        responses = await asyncio.gather(*[
+            async_client.post("/orders/", headers=headers) for _ in range(10)
+        ])
+
+        assert all(r.status_code == 201 for r in responses)
+        assert len({r.json()["id"] for r in responses}) == 1
+        assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 9
+        assert await db.orders.count_documents({"user_email": email}) == 1
+    finally:
+        await db.products.delete_one({"_id": product["_id"]})
+
+
+@pytest.mark.anyio
+async def test_order_counters_follow_status_changes(async_client):
+    from app.database import db
+    from app.order_stats import bump_order_counters, count_orders_by_status, read_counters, rebuild_counters
+    import app.order_stats as order_stats
+
+    order_stats.ORDER_COUNTERS_ENABLED = True
+    try:
+        counters = await rebuild_counters(db)
+        assert counters["by_status"] == await count_orders_by_status(db)
+
+        await bump_order_counters(db, None, "pending")
+        await bump_order_counters(db, "pending", "shipped")
+        after = await read_counters(db)
+        assert after["total"] == counters["total"] + 1
+        assert after["by_status"]["pending"] == counters["by_status"]["pending"]
+        assert after["by_status"]["shipped"] == counters["by_status"]["shipped"] + 1
+    finally:
+        order_stats.ORDER_COUNTERS_ENABLED = False
+        await rebuild_counters(db)
+
+
+@pytest.mark.anyio
+async def test_unknown_statuses_are_counted_as_other(async_client):
+    from app.database import db
+    from app.order_stats import ORDER_STATUSES, OTHER_STATUS, count_orders_by_status
+
+    email = "odd-status@example.com"
+    before = await count_orders_by_status(db)
+    await db.orders.insert_many([{"user_email": email, "status": "refunded"}, {"user_email": email}])
+    try:
+        counts = await count_orders_by_status(db)
+        assert set(counts) == set(ORDER_STATUSES) | {OTHER_STATUS}
+        assert counts[OTHER_STATUS] == before[OTHER_STATUS] + 2
+    finally:
+        await db.orders.delete_many({"user_email": email})
+
+
+@pytest.mark.anyio
+async def test_place_order_round_trips_grow_only_with_stocked_lines(async_client, make_shopper, max_db_calls):
+    from datetime import datetime
+    from app.database import db
+
+    async def checkout_round_trips(lines: int, stocked: bool) -> int:
+        products = [
+            {"name": f"Trip Product {i}", "price": 5.0, "in_stock": True, "created_at": datetime.utcnow()}
+            for i in range(lines)
+        ]
+        if stocked:
+            for p in products:
+                p["stock"] = 10
+        await db.products.insert_many(products)
+        headers = await make_shopper(
+            f"round-trips-{lines}-{stocked}@example.com",
+            cart=[{"product_id": str(p["_id"]), "quantity": 1} for p in products],
+        )
+        # user + cart + one $in for prices + order insert + cart clear,
+        # plus one conditional stock decrement per stock-tracked line
+        with max_db_calls(5 + (lines if stocked else 0)) as stats:
+            resp = await async_client.post("/orders/", headers=headers)
+        assert resp.status_code == 201
+        assert resp.headers["Server-Timing"].startswith("db;dur=")
+        return stats.calls
+
+    # Pricing is one query whatever the cart size...
+    assert await checkout_round_trips(1, stocked=False) == await checkout_round_trips(5, stocked=False)
+    # ...only stock reservation costs a round trip per (stock-tracked) line.
+    assert await checkout_round_trips(5, stocked=True) - await checkout_round_trips(1, stocked=True) == 4
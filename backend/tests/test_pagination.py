@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException
+from app.utils.pagination import (
+    ORDER_SORTS,
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    next_cursor_for,
+    PRODUCT_SORTS,
+    paginate_query,
+)
+from app.database import db
+
+
+def test_cursor_round_trip_keeps_types():
+    oid = ObjectId()
+    created = datetime(2025, 6, 1, 12, 30)
+    cursor = encode_cursor({"s": "created_at", "v": [created, str(oid)]})
+    assert decode_cursor(cursor, "created_at")["v"] == [created, str(oid)]
+
+
+def test_cursor_rejects_other_sort_and_garbage():
+    cursor = encode_cursor({"s": "price", "v": [10.0, str(ObjectId())]})
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, "created_at")
+    assert exc.value.status_code == 400
+
+    for bad in ("not-a-cursor", encode_cursor({"s": "price", "v": [1, "nope"]})):
+        with pytest.raises(HTTPException):
+            paginate_query({}, "price", bad)
+
+
+def test_paginate_query_builds_keyset_condition():
+    oid = ObjectId()
+    cursor = encode_cursor({"s": "-price", "v": [25.0, str(oid)]})
+    query = paginate_query({"category": "Books"}, "-price", cursor)
+    assert query == {"$and": [
+        {"category": "Books"},
+        {"$or": [{"price": {"$lt": 25.0}}, {"price": 25.0, "_id": {"$lt": oid}}, {"price": None}]},
+    ]}
+    assert paginate_query({"category": "Books"}, "price", None) == {"category": "Books"}
+
+
+def test_next_cursor_only_for_full_pages():
+    docs = [{"_id": ObjectId(), "price": float(i)} for i in range(3)]
+    assert next_cursor_for(docs, "price", limit=5) is None
+
+    cursor = next_cursor_for(docs, "price", limit=3)
+    assert decode_cursor(cursor, "price")["v"] == [2.0, str(docs[-1]["_id"])]
+
+
+def test_offset_cursor():
+    assert decode_offset_cursor(encode_cursor({"s": "relevance", "o": 24})) == 24
+    with pytest.raises(HTTPException):
+        decode_offset_cursor(encode_cursor({"s": "relevance", "o": "24"}))
+
+
+def test_order_history_cursor_walks_newest_first():
+    docs = [{"_id": ObjectId(), "created_at": datetime(2025, 6, 1)} for _ in range(2)]
+    cursor = next_cursor_for(docs, "-created_at", 2, ORDER_SORTS)
+    query = paginate_query({"user_email": "a@example.com"}, "-created_at", cursor, ORDER_SORTS)
+
+    after = query["$and"][1]["$or"]
+    assert after[0] == {"created_at": {"$lt": datetime(2025, 6, 1)}}
+    assert after[1]["_id"] == {"$lt": docs[-1]["_id"]}
+
+
+def test_keyset_condition_after_a_null_sort_value():
+    oid = ObjectId()
+    docs = [{"_id": oid, "name": "no price"}]  # missing counts as null
+
+    ascending = paginate_query({}, "price", next_cursor_for(docs, "price", 1))
+    assert ascending == {"$or": [{"price": None, "_id": {"$gt": oid}}, {"price": {"$ne": None}}]}
+    descending = paginate_query({}, "-price", next_cursor_for(docs, "-price", 1))
+    assert descending == {"price": None, "_id": {"$lt": oid}}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sort", ["price", "-price"])
+async def test_keyset_walk_includes_null_sort_values(sort):
+    collection = db.pagination_nulls
+    await collection.delete_many({})
+    await collection.insert_many([
+        {"price": 5.0}, {"price": None}, {"name": "no price"}, {"price": 1.0}, {"price": None},
+    ])
+    expected = [d["_id"] async for d in collection.find({}).sort(PRODUCT_SORTS[sort])]
+
+    seen, cursor = [], None
+    while True:
+        docs = await collection.find(paginate_query({}, sort, cursor)).sort(PRODUCT_SORTS[sort]).to_list(2)
+        seen += [d["_id"] for d in docs]
+        cursor = next_cursor_for(docs, sort, 2)
+        if cursor is None:
+            break
+
+    assert seen == expected
+    await collection.drop()
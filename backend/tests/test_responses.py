@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime
+from typing import List
+from bson import ObjectId
+from fastapi import APIRouter, FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+
+import app.utils.responses as responses
+from app.models.product_model import product_helper
+from app.models.user_model import user_helper
+from app.schemas.product_schema import ProductResponse
+from app.schemas.user_schema import UserResponse
+from app.utils.responses import FastJSONResponse, FastJSONRoute, trusted_response
+
+
+def test_fast_json_response_encodes_bson_types():
+    oid = ObjectId()
+    body = FastJSONResponse({"id": oid, "at": datetime(2025, 6, 1, 12, 30)}).body
+    assert body == b'{"id":"%s","at":"2025-06-01T12:30:00"}' % str(oid).encode()
+
+
+def test_trusted_helpers_match_their_response_models():
+    # @trusted_response routes rely on these shapes being exact.
+    product = product_helper({"_id": ObjectId(), "name": "n", "price": 1.0, "created_at": datetime.utcnow()})
+    user = user_helper({"_id": ObjectId(), "name": "n", "email": "a@example.com"})
+    assert set(product) == set(ProductResponse.model_fields)
+    assert set(user) == set(UserResponse.model_fields)
+    ProductResponse.model_validate(product)
+    UserResponse.model_validate(user)
+
+
+@pytest.mark.anyio
+async def test_trusted_route_skips_validation_but_keeps_headers(monkeypatch):
+    monkeypatch.setattr(responses, "SKIP_RESPONSE_VALIDATION", True)
+    router = APIRouter(route_class=FastJSONRoute)
+
+    @router.get("/items", response_model=List[ProductResponse])
+    @trusted_response
+    async def items(response: Response):
+        response.headers["X-Next-Cursor"] = "abc"
+        return [{"id": ObjectId(), "unvalidated": True}]
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/items")
+
+    assert resp.status_code == 200
+    assert resp.headers["X-Next-Cursor"] == "abc"
+    assert resp.json()[0]["unvalidated"] is True  # passed through as-is
+    assert "ProductResponse" in str(app.openapi())  # still documented
+
+
+def test_server_side_projections_match_response_models():
+    from app.models.order_model import ORDER_PROJECTION
+    from app.models.product_model import PRODUCT_PROJECTION
+    from app.schemas.order_schema import OrderResponse
+
+    assert set(PRODUCT_PROJECTION) - {"_id"} == set(ProductResponse.model_fields)
+    assert set(ORDER_PROJECTION) - {"_id"} == set(OrderResponse.model_fields)
+
+
+@pytest.mark.anyio
+async def test_admin_order_list_has_the_same_shape_with_raw_bson_reads(async_client, make_shopper, monkeypatch):
+    from app.database import db
+    from app.routes import admin_routes
+
+    headers = await make_shopper("raw-orders-admin@example.com", is_admin=True)
+    email = "raw-orders@example.com"
+    await db.orders.delete_many({"user_email": email})
+    now = datetime.utcnow()
+    await db.orders.insert_one({
+        "user_email": email,
+        "items": [{"product_id": str(ObjectId()), "quantity": 1, "price_at_purchase": 5.0}],
+        "total_price": 5.0,
+        "status": "pending",
+        "created_at": now,
+        "status_history": [{"status": "pending", "timestamp": now}],
+    })
+    try:
+        shapes = []
+        for raw in (False, True):
+            monkeypatch.setattr(admin_routes, "RAW_BSON_READS", raw)
+            resp = await async_client.get("/admin/orders", params={"email": email}, headers=headers)
+            assert resp.status_code == 200
+            shapes.append(resp.json())
+        default, raw = shapes
+        assert set(raw[0]) == set(default[0])
+        assert raw[0]["status_history"] == default[0]["status_history"]
+    finally:
+        await db.orders.delete_many({"user_email": email})
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import pytest
+from bson import ObjectId
+from app.search_index import CatalogSearch, ProductSearchIndex, tokenize
+
+
+def make_product(name, description="", category=None, price=10.0, in_stock=True):
+    return {
+        "_id": ObjectId(),
+        "name": name,
+        "description": description,
+        "category": category,
+        "price": price,
+        "in_stock": in_stock,
+    }
+
+
+def test_tokenize():
+    assert tokenize("Apple iPhone-16, Ultramarine!") == ["apple", "iphone", "16", "ultramarine"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_name_hits_first():
+    index = ProductSearchIndex()
+    in_desc = make_product("Leather Case", "fits the iphone 16")
+    in_name = make_product("Apple iPhone 16", "smartphone")
+    index.add(in_desc)
+    index.add(in_name)
+
+    results = index.search("iphone")
+    assert [doc_id for doc_id, _ in results] == [str(in_name["_id"]), str(in_desc["_id"])]
+
+
+def test_search_prefix_and_and_semantics():
+    index = ProductSearchIndex()
+    phone = make_product("Samsung Galaxy Phone")
+    tablet = make_product("Samsung Galaxy Tab")
+    index.add(phone)
+    index.add(tablet)
+
+    assert {d for d, _ in index.search("galaxy ph")} == {str(phone["_id"])}
+    assert len(index.search("sams")) == 2
+    assert index.search("samsung laptop") == []
+
+
+def test_search_filters_intersect_with_text_hits():
+    index = ProductSearchIndex()
+    cheap = make_product("USB Cable", category="Electronics", price=5.0)
+    pricey = make_product("USB Hub", category="Electronics", price=50.0, in_stock=False)
+    other = make_product("USB Themed Mug", category="Kitchen", price=7.0)
+    for p in (cheap, pricey, other):
+        index.add(p)
+
+    assert {d for d, _ in index.search("usb", category="Electronics")} == {str(cheap["_id"]), str(pricey["_id"])}
+    assert {d for d, _ in index.search("usb", max_price=10)} == {str(cheap["_id"]), str(other["_id"])}
+    assert {d for d, _ in index.search("usb", in_stock=False)} == {str(pricey["_id"])}
+    assert index.search("usb", min_price=100) == []
+
+
+def test_reindex_and_remove():
+    index = ProductSearchIndex()
+    prod = make_product("Old Name", price=10.0)
+    index.add(prod)
+
+    prod["name"] = "New Name"
+    prod["price"] = 20.0
+    index.add(prod)
+    assert index.search("old") == []
+    assert len(index.search("new", min_price=15)) == 1
+    assert len(index) == 1
+
+    index.remove(str(prod["_id"]))
+    assert index.search("new") == []
+    assert index.by_price == []
+    assert len(index) == 0
+
+
+def test_search_pagination():
+    index = ProductSearchIndex()
+    for i in range(30):
+        index.add(make_product(f"Widget {i}"))
+
+    first = index.search("widget", limit=12)
+    second = index.search("widget", limit=12, offset=12)
+    assert len(first) == 12 and len(second) == 12
+    assert not {d for d, _ in first} & {d for d, _ in second}
+
+
+def test_writes_after_first_query_are_visible():
+    index = ProductSearchIndex()
+    index.add(make_product("Phone Stand", "desk accessory for any phone"))
+    index.search("phone")  # builds the cached impact list for "phone"
+
+    best = make_product("Phone", "phone")
+    index.add(best)
+    assert index.search("phone")[0][0] == str(best["_id"])
+
+    index.remove(str(best["_id"]))
+    assert all(doc_id != str(best["_id"]) for doc_id, _ in index.search("phone"))
+
+
+def test_set_in_stock_moves_product_between_filters():
+    index = ProductSearchIndex()
+    prod = make_product("Desk Lamp")
+    index.add(prod)
+
+    index.set_in_stock(str(prod["_id"]), False)
+    assert index.search("lamp", in_stock=True) == []
+    assert len(index.search("lamp", in_stock=False)) == 1
+
+    index.set_in_stock(str(prod["_id"]), True)
+    assert len(index.search("lamp", in_stock=True)) == 1
+
+
+class StalledProducts:
+    """`find` blocks until `gate` is set, then fails."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.finds = 0
+
+    def find(self, *args):
+        self.finds += 1
+        return self._fail()
+
+    async def _fail(self):
+        await self.gate.wait()
+        raise RuntimeError("mongodb down")
+        yield
+
+
+class FakeDb:
+    def __init__(self):
+        self.products = StalledProducts()
+
+
+@pytest.mark.anyio
+async def test_background_refresh_runs_once_and_logs_failures(caplog):
+    search = CatalogSearch(refresh_seconds=1)
+    search.index = old = ProductSearchIndex()
+    db = FakeDb()
+
+    await search.ensure_ready(db)
+    refresh = search._refresh
+    await search.ensure_ready(db)  # refresh scheduled but not started: no second task
+    assert search._refresh is refresh
+
+    with caplog.at_level(logging.ERROR, logger="app.search_index"):
+        db.products.gate.set()
+        await asyncio.gather(refresh, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    assert db.products.finds == 1
+    assert search.index is old
+    assert "search index refresh failed" in caplog.text
@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from app.ws_backplane import Backplane, MemoryBroker
+from app.ws_manager import ConnectionManager
+
+
+class RecordingBroker(MemoryBroker):
+    def __init__(self):
+        super().__init__()
+        self.payloads = []
+
+    async def publish(self, payload):
+        self.payloads.append(payload)
+        await super().publish(payload)
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+
+@pytest.mark.anyio
+async def test_publish_reaches_sockets_on_other_workers():
+    broker = RecordingBroker()
+    workers = [ConnectionManager(coalesce_ms=0), ConnectionManager(coalesce_ms=0)]
+    planes = [Backplane(broker, m.push_update, batch_window_ms=5) for m in workers]
+    for plane in planes:
+        await plane.start()
+
+    socket = FakeSocket()
+    workers[1].register(socket, "a@example.com")  # the user is connected to worker 1
+
+    for status in ("shipped", "delivered"):
+        await planes[0].publish("a@example.com", {"type": "order_update", "new_status": status})
+    await asyncio.sleep(0.05)
+
+    assert [m["new_status"] for m in socket.sent] == ["shipped", "delivered"]
+    assert len(broker.payloads) == 1  # both events went out in one batch
+    assert planes[1].stats()["delivered"] == 2
+    assert planes[0].stats()["undelivered"] == 2
+
+
+@pytest.mark.anyio
+async def test_full_batch_flushes_immediately():
+    broker = RecordingBroker()
+    plane = Backplane(broker, ConnectionManager().push_update, batch_window_ms=10_000, batch_max=3)
+    await plane.start()
+
+    for i in range(3):
+        await plane.publish("a@example.com", {"n": i})
+    assert len(broker.payloads) == 1
+
+
+@pytest.mark.anyio
+async def test_not_started_delivers_locally():
+    manager = ConnectionManager()
+    socket = FakeSocket()
+    manager.register(socket, "a@example.com")
+    plane = Backplane(RecordingBroker(), manager.push_update)
+
+    await plane.publish("a@example.com", {"n": 1})
+    await asyncio.sleep(0.01)
+    assert socket.sent == [{"n": 1}]
+
+
+class FlakyPubSub:
+    """Drops the connection on the first listen(), then yields `messages`."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def subscribe(self, channel):
+        self.redis.subscribes += 1
+
+    async def listen(self):
+        if self.redis.subscribes == 1:
+            raise ConnectionError("connection reset")
+        for data in self.redis.messages:
+            yield {"type": "message", "data": data}
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        pass
+
+
+class FlakyRedis:
+    def __init__(self, messages):
+        self.messages = messages
+        self.subscribes = 0
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return FlakyPubSub(self)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.mark.anyio
+async def test_redis_broker_resubscribes_after_connection_loss():
+    pytest.importorskip("redis")
+    from app.ws_backplane import RedisBroker
+
+    broker = RedisBroker("redis://localhost:6379/0", "ws:test")
+    broker.redis = FlakyRedis(['{"events": [["a@example.com", {"n": 1}]]}'])
+    broker.RECONNECT_MIN = 0.01
+    manager = ConnectionManager(coalesce_ms=0)
+    socket = FakeSocket()
+    manager.register(socket, "a@example.com")
+    plane = Backplane(broker, manager.push_update)
+    await plane.start()
+    await asyncio.sleep(0.1)
+
+    assert socket.sent == [{"n": 1}]
+    stats = plane.stats()
+    assert stats["failures"] == 1 and stats["reconnects"] == 1 and stats["connected"]
+    await plane.stop()
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import pytest
+from app.ws_manager import CLOSE_IDLE, CLOSE_SLOW_CONSUMER, ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def send_json(self, message):
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def drain():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.anyio
+async def test_every_tab_of_a_user_gets_the_update():
+    manager = ConnectionManager(coalesce_ms=0)
+    tabs = [FakeSocket(), FakeSocket()]
+    conns = [manager.register(ws, "a@example.com") for ws in tabs]
+    other = FakeSocket()
+    manager.register(other, "b@example.com")
+
+    await manager.push_update("a@example.com", {"type": "order_update"})
+    await drain()
+    assert [ws.sent for ws in tabs] == [[{"type": "order_update"}]] * 2
+    assert other.sent == []
+
+    manager.disconnect(conns[0])
+    assert manager.stats()["connections"] == 2
+    manager.disconnect(conns[1])
+    assert "a@example.com" not in manager.active_connections
+
+
+@pytest.mark.anyio
+async def test_slow_consumer_does_not_delay_others():
+    manager = ConnectionManager(max_queue=2, send_timeout=5, slow_consumer="disconnect")
+    slow = FakeSocket(delay=1)
+    fast = FakeSocket()
+    manager.register(slow, "a@example.com")
+    manager.register(fast, "a@example.com")
+
+    pending_closes = 0
+    for i in range(5):
+        await manager.push_update("a@example.com", {"n": i})
+        pending_closes = max(pending_closes, len(manager._closing))  # referenced until done
+        await asyncio.sleep(0.005)  # the fast writer keeps up
+    await drain()
+    assert pending_closes == 1
+    assert not manager._closing
+
+    assert len(fast.sent) == 5
+    assert slow.closed_with == CLOSE_SLOW_CONSUMER
+    assert manager.stats()["connections"] == 1
+
+
+@pytest.mark.anyio
+async def test_send_timeout_closes_socket():
+    manager = ConnectionManager(send_timeout=0.01)
+    stuck = FakeSocket(delay=1)
+    manager.register(stuck, "a@example.com")
+
+    await manager.push_update("a@example.com", {"n": 1})
+    await drain()
+    assert stuck.closed_with is not None
+    assert manager.stats()["send_failures"] == 1
+    assert manager.active_connections == {}
+
+
+@pytest.mark.anyio
+async def test_status_burst_for_one_order_is_one_frame():
+    manager = ConnectionManager(coalesce_ms=20)
+    socket = FakeSocket()
+    manager.register(socket, "a@example.com")
+
+    for status in ("shipped", "delivered"):
+        await manager.push_update("a@example.com", {"type": "order_update", "order_id": "o1", "new_status": status})
+    await manager.push_update("a@example.com", {"type": "order_update", "order_id": "o2", "new_status": "cancelled"})
+    await asyncio.sleep(0.05)
+
+    assert sorted((m["order_id"], m["new_status"]) for m in socket.sent) == [("o1", "delivered"), ("o2", "cancelled")]
+    assert manager.stats()["coalesced"] == 1
+
+
+@pytest.mark.anyio
+async def test_heartbeat_pings_live_sockets_and_reaps_silent_ones():
+    manager = ConnectionManager(ping_interval=0.02, idle_timeout=0.05)
+    live, dead = FakeSocket(), FakeSocket()
+    live_conn = manager.register(live, "a@example.com")
+    manager.register(dead, "b@example.com")
+
+    for _ in range(6):
+        await asyncio.sleep(0.02)
+        manager.touch(live_conn)  # the live client answers every ping
+
+    assert {"type": "ping"} in live.sent
+    assert live.closed_with is None
+    assert dead.closed_with == CLOSE_IDLE
+    assert manager.stats()["reaped"] == 1
+    await manager.stop()
+
+
+@pytest.mark.anyio
+async def test_background_tasks_restart_after_they_die(caplog):
+    manager = ConnectionManager(coalesce_ms=5, ping_interval=60)
+    socket = FakeSocket()
+    manager.register(socket, "a@example.com")
+
+    manager._heartbeat.cancel()
+    await drain()
+    assert manager._heartbeat is None
+    manager.register(FakeSocket(), "b@example.com")
+    assert manager._heartbeat is not None and not manager._heartbeat.done()
+
+    fan_out = manager._fan_out
+    manager._fan_out = lambda email, message: 1 / 0
+    with caplog.at_level(logging.ERROR, logger="app.ws_manager"):
+        await manager.push_update("a@example.com", {"type": "order_update", "order_id": "o1"})
+        await drain()
+    assert "coalesce_flush task failed" in caplog.text
+
+    manager._fan_out = fan_out
+    await manager.push_update("a@example.com", {"type": "order_update", "order_id": "o2"})
+    await drain()
+    assert socket.sent == [{"type": "order_update", "order_id": "o2"}]
+    await manager.stop()
@@ -37,6 +37,11 @@ export function WsProvider({ children }) {
         console.error("Failed to parse WebSocket message:", evt.data);
         return;
       }
+      // Server heartbeat: answer so the connection isn't reaped as idle
+      if (msg.type === "ping") {
+        socket.send(JSON.stringify({ type: "pong" }));
+        return;
+      }
       for (let fn of listenersRef.current) fn(msg);
     };
 